@@ -0,0 +1,111 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from odmor.jezgra import baza, izvjestaji
+
+log = logging.getLogger('batch_reports')
+
+FORMATI = {  # Naziv formata: (vrsta izvjestaja, ekstenzija)
+    'xlsx': (izvjestaji.XLSX, '.xlsx'),
+    'xlsx-zaposlenici': (izvjestaji.XLSX_PO_ZAPOSLENIKU, '.xlsx'),
+    'csv': (izvjestaji.CSV, '.csv'),
+    'json': (izvjestaji.JSON, '.json'),
+}
+
+_veza = None  # Veza samo za citanje u procesu radnika
+
+
+def otvori_vezu(putanja):
+    global _veza
+    _veza = baza.otvori(putanja, samo_citanje=True)
+
+
+def izradi(posao):
+    # Izvodi se u procesu radnika, vraca putanju datoteke i trajanje
+    vrsta_izvjestaja, argumenti, vrsta, fpath = posao
+    pocetak = time.perf_counter()
+    if vrsta_izvjestaja == 'period':
+        izvjestaji.izvezi_period(_veza, *argumenti, fpath, vrsta)
+    else:
+        izvjestaji.izvezi_godinu(_veza, *argumenti, fpath, vrsta)
+    return fpath, time.perf_counter() - pocetak
+
+
+def period(tekst):
+    try:
+        datum_od, datum_do = (date.fromisoformat(d) for d in tekst.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('period se zadaje kao yyyy-mm-dd:yyyy-mm-dd')
+    if datum_do < datum_od:
+        raise argparse.ArgumentTypeError('kraj perioda je prije pocetka')
+    return datum_od, datum_do
+
+
+def mjeseci(godina):
+    for mjesec in range(1, 13):
+        prvi = date(godina, mjesec, 1)
+        yield prvi, (prvi + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+
+
+def poslovi(args):
+    # Svaki izvjestaj u svakom formatu je zaseban posao
+    periodi = list(args.period) + [p for godina in args.mjeseci for p in mjeseci(godina)]
+    for format_ in args.format:
+        vrsta, ekstenzija = FORMATI[format_]
+        sufiks = '_zaposlenici' if vrsta == izvjestaji.XLSX_PO_ZAPOSLENIKU else ''
+        for datum_od, datum_do in periodi:
+            fpath = os.path.join(args.izlaz, f'odmor_{datum_od}_{datum_do}{sufiks}{ekstenzija}')
+            yield 'period', (datum_od, datum_do), vrsta, fpath
+        if vrsta == izvjestaji.XLSX_PO_ZAPOSLENIKU:  # Godisnji izvjestaj je vec redak po zaposleniku
+            continue
+        for godina in args.godina:
+            yield 'godina', (godina,), vrsta, os.path.join(args.izlaz, f'godisnji_{godina}{ekstenzija}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Skupna izrada izvjestaja godisnjeg odmora bez GUI-ja')
+    parser.add_argument('--period', type=period, action='append', default=[], metavar='OD:DO',
+                        help='izvjestaj za period, npr. 2020-07-01:2020-07-31 (moze se ponoviti)')
+    parser.add_argument('--mjeseci', type=int, action='append', default=[], metavar='GODINA',
+                        help='izvjestaj za svaki mjesec zadane godine')
+    parser.add_argument('--godina', type=int, action='append', default=[],
+                        help='godisnji izvjestaj po zaposleniku za zadanu godinu')
+    parser.add_argument('--format', choices=FORMATI, action='append', help='format izvjestaja (zadano xlsx)')
+    parser.add_argument('--izlaz', default='.', help='direktorij za izvjestaje')
+    parser.add_argument('--baza', default=baza.dbase_name, help='putanja do baze')
+    parser.add_argument('--procesa', type=int, default=os.cpu_count(), help='broj procesa koji izraduju izvjestaje')
+    args = parser.parse_args(argv)
+    args.format = args.format or ['xlsx']
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    if not os.path.exists(args.baza):
+        parser.error(f'baza {args.baza} ne postoji')
+    os.makedirs(args.izlaz, exist_ok=True)
+    popis = list(poslovi(args))
+    if not popis:
+        parser.error('nije zadan nijedan izvjestaj (--period, --mjeseci ili --godina)')
+
+    pocetak = time.perf_counter()
+    neuspjelih = 0
+    with ProcessPoolExecutor(max_workers=min(args.procesa, len(popis)), initializer=otvori_vezu,
+                             initargs=(args.baza,)) as izvrsitelj:
+        buduci = {izvrsitelj.submit(izradi, posao): posao for posao in popis}
+        for gotov in as_completed(buduci):
+            try:
+                fpath, trajanje = gotov.result()
+                log.info('%s (%.2f s)', fpath, trajanje)
+            except Exception as e:
+                neuspjelih += 1
+                log.error('%s: %s', buduci[gotov][3], e)
+    log.info('Izradeno %s od %s izvjestaja za %.2f s', len(popis) - neuspjelih, len(popis),
+             time.perf_counter() - pocetak)
+    return 1 if neuspjelih else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from PyQt5.QtCore import QEventLoop, PYQT_VERSION_STR
+from PyQt5.QtWidgets import QApplication
+
+import database_create
+from odmor import kalendar, podaci, radnik, upiti
+from odmor.jezgra import baza
+from odmor.jezgra.repozitoriji import UkupnoDana
+
+IMENA = ('Ivan', 'Ana', 'Marko', 'Maja', 'Luka', 'Petra', 'Josip', 'Ivana', 'Tomislav', 'Marija', 'Đuro',
+         'Lucija', 'Nikola', 'Katarina', 'Mateo', 'Sara', 'Filip', 'Ema', 'Šime', 'Željka')
+PREZIMENA = ('Horvat', 'Kovačević', 'Babić', 'Marić', 'Jurić', 'Novak', 'Kovačić', 'Knežević', 'Vuković',
+             'Marković', 'Petrović', 'Matić', 'Tomić', 'Pavlović', 'Božić', 'Šimić', 'Blažević', 'Grgić', 'Perić',
+             'Đurić')
+MJERENJA = ('set_model_data', 'pregled_za_period', 'DialogPregledZaPeriod', 'write_to_excel', 'otvori_godinu',
+            'DialogPregledGodisnjeg')
+
+log = logging.getLogger('benchmark')
+
+
+def generiraj(zaposlenika, od_godine, do_godine, gustoca, sjeme=1):
+    # Sintetski podaci u bazi stvorenoj iz sheme aplikacije (database_create). Svaka sljedeca godina se
+    # otvara kao u aplikaciji, s prijenosom neiskoristenih dana. Gustoca je udio dostupnih dana koji
+    # zaposlenik prosjecno iskoristi.
+    slucajno = random.Random(sjeme)
+    veza = baza.otvori()
+    with baza.transakcija(veza):
+        veza.executemany(upiti.NOVI_ZAPOSLENIK, ({'ime': slucajno.choice(IMENA), 'prezime': slucajno.choice(PREZIMENA)}
+                                                 for _ in range(zaposlenika)))
+        rbovi = [red[0] for red in veza.execute('SELECT rb FROM zaposlenici;')]
+        veza.executemany('INSERT INTO ukupno_dana (zaposlenik_rb, godina, br_dana) VALUES (?, ?, ?);',
+                         ((rb, od_godine, slucajno.randint(20, 30)) for rb in rbovi))
+    for godina in range(od_godine, do_godine + 1):
+        if godina > od_godine:
+            UkupnoDana(veza).otvori_godinu(godina, prenesi=True)
+        radni_dani = [kalendar.julijanski_dan(datum)
+                      for datum in kalendar.kalendar().radni_dani(date(godina, 1, 1), date(godina, 12, 31))]
+        with baza.transakcija(veza):
+            dostupno = veza.execute('SELECT zaposlenik_rb, br_dana + preneseno FROM ukupno_dana WHERE godina = ?;',
+                                    (godina,)).fetchall()
+            for rb, dana in dostupno:
+                broj = min(dana, len(radni_dani), round(dana * gustoca * slucajno.uniform(0.5, 1.5)))
+                veza.executemany(upiti.NOVI_ODMOR, ((rb, dan, godina) for dan in slucajno.sample(radni_dani, broj)))
+    veza.close()
+
+
+def opis_podataka():
+    veza = baza.otvori(samo_citanje=True)
+    try:
+        zaposlenika, = veza.execute('SELECT count(*) FROM zaposlenici;').fetchone()
+        dana, = veza.execute('SELECT count(*) FROM dani_odmora;').fetchone()
+        od_godine, do_godine = veza.execute('SELECT min(godina), max(godina) FROM ukupno_dana;').fetchone()
+        zaposlenik = veza.execute("""
+            SELECT z.rb, z.ime, z.prezime FROM ukupno_dana u JOIN zaposlenici z ON z.rb = u.zaposlenik_rb
+            WHERE u.godina = ? ORDER BY u.iskoristeno DESC LIMIT 1;""", (do_godine,)).fetchone()
+    finally:
+        veza.close()
+    return {'zaposlenika': zaposlenika, 'dana_odmora': dana, 'od_godine': od_godine, 'do_godine': do_godine}, zaposlenik
+
+
+def cekaj(pokreni):
+    # pokreni(gotovo) salje posao radniku, petlja dogadaja se vrti dok se ne pozove gotovo
+    petlja = QEventLoop()
+    rezultat = []
+
+    def gotovo(*args):
+        rezultat.append(args[0] if args else None)
+        petlja.quit()
+
+    pokreni(gotovo)
+    if not rezultat:
+        petlja.exec_()
+    return rezultat[0]
+
+
+def mjeri(funkcija, ponavljanja):
+    trajanja = []
+    for _ in range(ponavljanja):
+        pocetak = time.perf_counter()
+        funkcija()
+        trajanja.append(time.perf_counter() - pocetak)
+    return {'min': min(trajanja), 'medijan': statistics.median(trajanja), 'ponavljanja': ponavljanja}
+
+
+def izmjeri(godina, zaposlenik, ponavljanja, mjerenja):
+    # Dijalozi se prikazuju na offscreen platformi i iscrtavaju prije zatvaranja
+    from odmor.dialogs import DialogPregledGodisnjeg, DialogPregledZaPeriod
+    from odmor.main_widget import CentralWidget
+
+    app = QApplication.instance()
+    period = date(godina, 1, 1), date(godina, 12, 31)
+    pregled = cekaj(lambda gotovo: radnik.posalji(podaci.pregled_za_period, *period, gotovo=gotovo))
+    fpath = os.path.join(tempfile.mkdtemp(), 'period.xlsx')
+
+    def prikazi(dialog):
+        dialog.show()
+        app.processEvents()
+        dialog.close()
+        dialog.deleteLater()
+
+    widget = CentralWidget()
+    widget.pracenje.zaustavi()
+    widget.godina_odmora = godina
+    widget.show()
+    dialog_period = DialogPregledZaPeriod(pregled)
+    funkcije = {
+        'set_model_data': lambda: cekaj(widget.set_model_data),
+        'pregled_za_period': lambda: cekaj(lambda gotovo: radnik.posalji(podaci.pregled_za_period, *period,
+                                                                         gotovo=gotovo)),
+        'DialogPregledZaPeriod': lambda: prikazi(DialogPregledZaPeriod(pregled)),
+        'write_to_excel': lambda: dialog_period.write_to_excel(fpath),
+        'otvori_godinu': lambda: cekaj(lambda gotovo: radnik.posalji(podaci.otvori_godinu, godina + 1, True, True,
+                                                                     gotovo=gotovo)),
+        'DialogPregledGodisnjeg': lambda: prikazi(DialogPregledGodisnjeg(zaposlenik, godina)),
+    }
+    rezultati = {}
+    for naziv in mjerenja:
+        rezultati[naziv] = mjeri(funkcije[naziv], ponavljanja)
+        log.info('%-24s min %8.1f ms   medijan %8.1f ms', naziv, rezultati[naziv]['min'] * 1000,
+                 rezultati[naziv]['medijan'] * 1000)
+    widget.close()
+    return rezultati
+
+
+def zapisi_povijest(fpath, mjerenje):
+    # Povijest je lista mjerenja. Usporedba je s zadnjim mjerenjem nad istim podacima.
+    povijest = []
+    if os.path.exists(fpath):
+        with open(fpath, encoding='utf-8') as f:
+            povijest = json.load(f)
+    prethodno = next((m for m in reversed(povijest) if m['podaci'] == mjerenje['podaci']), None)
+    if prethodno is not None:
+        for naziv, rezultat in mjerenje['rezultati'].items():
+            if naziv in prethodno['rezultati']:
+                promjena = rezultat['medijan'] / prethodno['rezultati'][naziv]['medijan'] - 1
+                log.info('%-24s %+6.1f %% u odnosu na %s', naziv, promjena * 100, prethodno['vrijeme'])
+    povijest.append(mjerenje)
+    with open(fpath, 'w', encoding='utf-8') as f:
+        json.dump(povijest, f, ensure_ascii=False, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mjerenje brzine aplikacije nad sintetskim podacima')
+    parser.add_argument('--baza', default='benchmark.db', help='baza za mjerenje')
+    parser.add_argument('--generiraj', action='store_true', help='stvori bazu sa sintetskim podacima (brise postojecu)')
+    parser.add_argument('--zaposlenika', type=int, default=1000)
+    parser.add_argument('--godine', type=int, nargs=2, default=(2020, 2024), metavar=('OD', 'DO'))
+    parser.add_argument('--gustoca', type=float, default=0.8, help='prosjecni udio iskoristenih dana godisnjeg')
+    parser.add_argument('--sjeme', type=int, default=1, help='sjeme generatora slucajnih podataka')
+    parser.add_argument('--ponavljanja', type=int, default=5)
+    parser.add_argument('--mjerenja', nargs='+', choices=MJERENJA, default=MJERENJA)
+    parser.add_argument('--povijest', default='benchmark_povijest.json', help='JSON datoteka s rezultatima mjerenja')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    log.setLevel(logging.INFO)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    database_create.postavi_bazu(args.baza)
+    log.info('Nacin dnevnika baze: %s', baza.postavi_nacin_dnevnika())
+    if args.generiraj:
+        for sufiks in ('', '-wal', '-shm'):
+            if os.path.exists(args.baza + sufiks):
+                os.remove(args.baza + sufiks)
+    elif not os.path.exists(args.baza):
+        parser.error(f'baza {args.baza} ne postoji, pokrenite s --generiraj')
+
+    app = QApplication(sys.argv)
+    database_create.create_connection()
+    if args.generiraj:
+        pocetak = time.perf_counter()
+        generiraj(args.zaposlenika, *args.godine, args.gustoca, args.sjeme)
+        log.info('Podaci generirani za %.1f s', time.perf_counter() - pocetak)
+
+    podaci_baze, zaposlenik = opis_podataka()
+    log.info('Baza: %s', ', '.join(f'{k}={v}' for k, v in podaci_baze.items()))
+    rezultati = izmjeri(podaci_baze['do_godine'], zaposlenik, args.ponavljanja, args.mjerenja)
+    pripremljeni = podaci.statistika_upita()
+    log.info('Pripremljene naredbe: %s', ', '.join(f'{k}={v}' for k, v in pripremljeni.items()))
+    zapisi_povijest(args.povijest, {
+        'vrijeme': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pyqt': PYQT_VERSION_STR,
+        'podaci': podaci_baze,
+        'rezultati': rezultati,
+        'pripremljene_naredbe': pripremljeni,
+    })
+    radnik.zaustavi()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,145 @@
+import logging
+from datetime import date
+
 from PyQt5 import QtSql
 
-dbase_name = 'odmorzap.db'
+from odmor import kalendar, upiti
+from odmor.jezgra import baza
+
+dbase_name = baza.dbase_name
+log = logging.getLogger(__name__)
+
+# Naziv veze radnika, jedine dretve koja pise. Izvozi i izvjestaji otvaraju veze samo za citanje (odmor.jezgra.baza).
+VEZA_PISANJE = 'pisanje'
+
+# Postavke veza su zajednicke s vezama bez Qt-a (odmor.jezgra.baza)
+pragme = baza.pragme
+busy_timeout = baza.busy_timeout
+
+
+def postavi_bazu(putanja):
+    # Ista putanja vrijedi za veze preko Qt-a i za veze bez Qt-a (izvozi, izvjestaji)
+    global dbase_name
+    dbase_name = baza.dbase_name = putanja
 
 
 def create_connection():
-    dbase = QtSql.QSqlDatabase.addDatabase('QSQLITE')
-    dbase.setDatabaseName(dbase_name)
-    if not dbase.open():
-        raise Exception(dbase.lastError().text())
+    dbase = open_connection()
+    pripremi_bazu(dbase)
+    provjeri_plan_upita(dbase)
+    return True
+
+
+def pripremi_bazu(dbase):
+    # Stvaranje tablica i migracije sheme. Aplikacija ih izvrsava u radniku dok je prozor vec prikazan.
     if not dbase.tables():
-        query = QtSql.QSqlQuery()
+        query = QtSql.QSqlQuery(dbase)
         zap, odmor, dana = query_create_table()
         if not query.exec_(zap) or not query.exec_(odmor) or not query.exec_(dana):
             raise Exception(dbase.lastError().text())
-    query = QtSql.QSqlQuery()
-    if not query.exec_('PRAGMA foreign_keys = ON'):
-        raise Exception(dbase.lastError().text())
+    migrate_schema(dbase)
+    postavke = postavke_veze(dbase)
+    log.info('Postavke baze: %s', ', '.join(f'{k}={v}' for k, v in postavke.items()))
+    if str(postavke.get('journal_mode')).upper() != pragme['journal_mode'].upper():  # Npr. druga veza drzi WAL
+        log.warning('Nacin dnevnika %s nije primijenjen, baza koristi %s', pragme['journal_mode'],
+                    postavke.get('journal_mode'))
     return True
 
 
+def open_connection(naziv=None):
+    # Svaka dretva koja radi s bazom otvara svoju vezu pod svojim nazivom, GUI dretva koristi zadanu vezu
+    if naziv is None:
+        dbase = QtSql.QSqlDatabase.addDatabase('QSQLITE')
+    else:
+        dbase = QtSql.QSqlDatabase.addDatabase('QSQLITE', naziv)
+    dbase.setDatabaseName(dbase_name)
+    dbase.setConnectOptions(f'QSQLITE_BUSY_TIMEOUT={busy_timeout}')
+    if not dbase.open():
+        raise Exception(dbase.lastError().text())
+    query = QtSql.QSqlQuery(dbase)
+    for pragma, vrijednost in pragme.items():
+        if not query.exec_(f'PRAGMA {pragma} = {vrijednost};'):
+            raise Exception(query.lastError().text())
+    return dbase
+
+
+def postavke_veze(dbase):
+    # Stvarne vrijednosti postavki, SQLite neke vrijednosti ogranicava ili ih ne podrzava
+    query = QtSql.QSqlQuery(dbase)
+    postavke = {}
+    for pragma in pragme:
+        if query.exec_(f'PRAGMA {pragma};') and query.next():
+            postavke[pragma] = query.value(0)
+    return postavke
+
+
+def migrate_schema(dbase):
+    # Verzija sheme se cuva u PRAGMA user_version, primjenjuju se samo migracije novije od nje
+    query = QtSql.QSqlQuery('PRAGMA user_version;', dbase)
+    verzija = query.value(0) if query.next() else 0
+    for nova_verzija, naredbe in enumerate(query_migrations()[verzija:], start=verzija + 1):
+        dbase.transaction()
+        for naredba in naredbe:
+            if not query.exec_(naredba):
+                dbase.rollback()
+                raise Exception(query.lastError().text())
+        query.exec_(f'PRAGMA user_version = {nova_verzija};')
+        dbase.commit()
+        log.info('Shema baze migrirana na verziju %s', nova_verzija)
+
+
+def provjeri_plan_upita(dbase=None):
+    # Zapisuje u log svaki upit cije izvrsavanje cita cijelu tablicu umjesto indeksa
+    godina = date.today().year
+    uvjet, pretraga = upiti.uvjet_pretrage('ivan')
+    period = {'dan_od': kalendar.julijanski_dan(date(godina, 1, 1)),
+              'dan_do': kalendar.julijanski_dan(date(godina, 12, 31))}
+    upiti_za_provjeru = {
+        'pregled zaposlenika': (upiti.PREGLED_ZAPOSLENIKA.format(pretraga=''),
+                                {'godina': godina, 'zadnji_rb': 0, 'limit': 100}),
+        'pretraga zaposlenika': (upiti.PREGLED_ZAPOSLENIKA.format(pretraga=uvjet),
+                                 dict(godina=godina, zadnji_rb=0, limit=100, **pretraga)),
+        'otvorena godina': (upiti.GODINA_OTVORENA, {'godina': godina}),
+        'stanje godisnjeg': (upiti.STANJE_GODISNJEG, {'rb': 1, 'godina': godina}),
+        'promjene od verzije': (upiti.PROMJENE_OD_VERZIJE, {'verzija': 0}),
+        'pregled za period': (upiti.PREGLED_ZA_PERIOD, period),
+    }
+    skeniranja = {}
+    for naziv, (sql, vrijednosti) in upiti_za_provjeru.items():
+        query = QtSql.QSqlQuery(dbase if dbase is not None else QtSql.QSqlDatabase.database())
+        query.prepare(f'EXPLAIN QUERY PLAN {sql}')
+        for parametar, vrijednost in vrijednosti.items():
+            query.bindValue(f':{parametar}', vrijednost)
+        if not query.exec_():
+            log.warning('Plan upita "%s" nije dostupan: %s', naziv, query.lastError().text())
+            continue
+        while query.next():
+            detalj = query.value(3)
+            if detalj.startswith('SCAN ') and 'INDEX' not in detalj and detalj != 'SCAN CONSTANT ROW':
+                skeniranja.setdefault(naziv, []).append(detalj)
+    for naziv, detalji in skeniranja.items():
+        log.warning('Upit "%s" cita cijelu tablicu: %s', naziv, '; '.join(detalji))
+    return skeniranja
+
+
+def provjeri_brojace(popravi=False):
+    # Vraca broj redaka ukupno_dana ciji se brojac iskoristenih dana ne slaze s tablicom dani_odmora
+    query = QtSql.QSqlQuery()
+    if not query.exec_(upiti.NEISPRAVNI_BROJACI):
+        raise Exception(query.lastError().text())
+    neispravni = []
+    while query.next():
+        neispravni.append([query.value(i) for i in range(5)])
+    for rb, zaposlenik_rb, godina, brojac, stvarno in neispravni:
+        log.warning('Brojac zaposlenika %s za %s. godinu je %s, a iskoristeno je %s dana',
+                    zaposlenik_rb, godina, brojac, stvarno)
+    if popravi and neispravni:
+        if not query.exec_(upiti.POPRAVI_BROJACE):
+            raise Exception(query.lastError().text())
+        log.info('Popravljeno brojaca: %s', len(neispravni))
+    return len(neispravni)
+
+
 def query_create_table():
     return (
         """
@@ -47,3 +168,173 @@ def query_create_table():
             UNIQUE (zaposlenik_rb, godina)
         );"""
     )
+
+
+def query_migrations():
+    # Element na indeksu i podiže shemu na verziju i + 1
+    return (
+        (  # 1: pokrivajuci indeksi za pregled zaposlenika (godina) i pregled za period (datum)
+            "CREATE INDEX IF NOT EXISTS idx_odmor_godina_zaposlenik ON odmor (godina, zaposlenik_rb);",
+            "CREATE INDEX IF NOT EXISTS idx_odmor_datum_zaposlenik ON odmor (datum, zaposlenik_rb);",
+        ),
+        (  # 2: brojac iskoristenih dana u ukupno_dana, odrzavaju ga okidaci nad tablicom odmor
+            "ALTER TABLE ukupno_dana ADD COLUMN iskoristeno INTEGER NOT NULL DEFAULT 0;",
+            """UPDATE ukupno_dana SET iskoristeno = (
+                SELECT count(*) FROM odmor o
+                WHERE o.zaposlenik_rb = ukupno_dana.zaposlenik_rb AND o.godina = ukupno_dana.godina);""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_iskoristeno_insert AFTER INSERT ON odmor BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno + 1
+                WHERE zaposlenik_rb = NEW.zaposlenik_rb AND godina = NEW.godina;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_iskoristeno_delete AFTER DELETE ON odmor BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno - 1
+                WHERE zaposlenik_rb = OLD.zaposlenik_rb AND godina = OLD.godina;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_iskoristeno_update AFTER UPDATE OF zaposlenik_rb, godina ON odmor
+            WHEN OLD.zaposlenik_rb IS NOT NEW.zaposlenik_rb OR OLD.godina IS NOT NEW.godina BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno - 1
+                WHERE zaposlenik_rb = OLD.zaposlenik_rb AND godina = OLD.godina;
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno + 1
+                WHERE zaposlenik_rb = NEW.zaposlenik_rb AND godina = NEW.godina;
+            END;""",
+            # Godina se moze otvoriti i nakon sto su uneseni dani pa se brojac postavlja pri unosu retka
+            """CREATE TRIGGER IF NOT EXISTS ukupno_dana_iskoristeno_insert AFTER INSERT ON ukupno_dana BEGIN
+                UPDATE ukupno_dana SET iskoristeno = (
+                    SELECT count(*) FROM odmor o WHERE o.zaposlenik_rb = NEW.zaposlenik_rb AND o.godina = NEW.godina)
+                WHERE rb = NEW.rb;
+            END;""",
+        ),
+        (  # 3: provjera je li godina otvorena i otvaranje nove godine traze ukupno_dana po godini
+            "CREATE INDEX IF NOT EXISTS idx_ukupno_dana_godina ON ukupno_dana (godina);",
+        ),
+        (  # 4: FTS5 indeks imena i prezimena za pretragu, rowid je rb zaposlenika
+            """CREATE VIRTUAL TABLE IF NOT EXISTS zaposlenici_pretraga
+            USING fts5(tekst, tokenize = 'unicode61 remove_diacritics 2');""",
+            """INSERT INTO zaposlenici_pretraga (rowid, tekst)
+            SELECT rb, replace(replace(ime || ' ' || prezime, 'đ', 'd'), 'Đ', 'd') FROM zaposlenici;""",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_pretraga_insert AFTER INSERT ON zaposlenici BEGIN
+                INSERT INTO zaposlenici_pretraga (rowid, tekst)
+                VALUES (NEW.rb, replace(replace(NEW.ime || ' ' || NEW.prezime, 'đ', 'd'), 'Đ', 'd'));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_pretraga_update AFTER UPDATE ON zaposlenici BEGIN
+                DELETE FROM zaposlenici_pretraga WHERE rowid = OLD.rb;
+                INSERT INTO zaposlenici_pretraga (rowid, tekst)
+                VALUES (NEW.rb, replace(replace(NEW.ime || ' ' || NEW.prezime, 'đ', 'd'), 'Đ', 'd'));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_pretraga_delete AFTER DELETE ON zaposlenici BEGIN
+                DELETE FROM zaposlenici_pretraga WHERE rowid = OLD.rb;
+            END;""",
+        ),
+        (  # 5: dani preneseni iz prethodne godine pri otvaranju godine
+            "ALTER TABLE ukupno_dana ADD COLUMN preneseno INTEGER NOT NULL DEFAULT 0;",
+        ),
+        (  # 6: zadnja verzija promjene po zaposleniku, da drugi klijenti iste baze dohvate samo promijenjene.
+           # Unos dana u odmor mijenja brojac u ukupno_dana pa ga biljezi okidac nad ukupno_dana.
+            """CREATE TABLE IF NOT EXISTS promjene(
+                zaposlenik_rb INTEGER PRIMARY KEY,
+                verzija       INTEGER NOT NULL
+            );""",
+            "CREATE INDEX IF NOT EXISTS idx_promjene_verzija ON promjene (verzija);",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_promjene_insert AFTER INSERT ON zaposlenici BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (NEW.rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_promjene_update AFTER UPDATE ON zaposlenici BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (NEW.rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS zaposlenici_promjene_delete AFTER DELETE ON zaposlenici BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (OLD.rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS ukupno_dana_promjene_insert AFTER INSERT ON ukupno_dana BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (NEW.zaposlenik_rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS ukupno_dana_promjene_update AFTER UPDATE ON ukupno_dana BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (NEW.zaposlenik_rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS ukupno_dana_promjene_delete AFTER DELETE ON ukupno_dana BEGIN
+                INSERT OR REPLACE INTO promjene (zaposlenik_rb, verzija)
+                VALUES (OLD.zaposlenik_rb, (SELECT coalesce(max(verzija), 0) + 1 FROM promjene));
+            END;""",
+        ),
+        (  # 7: dani odmora kao julijanski dani (cijeli broj) u tablici dani_odmora. Pogled odmor s datumom kao
+           # tekstom i okidacima za pisanje ostaje da stariji klijenti iste baze i dalje rade.
+            """CREATE TABLE IF NOT EXISTS dani_odmora(
+                rb            INTEGER PRIMARY KEY,
+                zaposlenik_rb INTEGER NOT NULL,
+                dan           INTEGER NOT NULL,
+                godina        INTEGER NOT NULL,
+                napomena      TEXT,
+                FOREIGN KEY (zaposlenik_rb) REFERENCES zaposlenici (rb)
+                ON DELETE CASCADE ON UPDATE CASCADE,
+                UNIQUE(zaposlenik_rb, dan)
+            );""",
+            """INSERT INTO dani_odmora (rb, zaposlenik_rb, dan, godina, napomena)
+            SELECT rb, zaposlenik_rb, CAST(julianday(datum) + 0.5 AS INTEGER), godina, napomena FROM odmor;""",
+            "DROP TABLE odmor;",  # S tablicom se brisu i njeni indeksi i okidaci brojaca
+            "CREATE INDEX IF NOT EXISTS idx_dani_odmora_godina_zaposlenik ON dani_odmora (godina, zaposlenik_rb);",
+            "CREATE INDEX IF NOT EXISTS idx_dani_odmora_dan_zaposlenik ON dani_odmora (dan, zaposlenik_rb);",
+            """CREATE TRIGGER IF NOT EXISTS dani_odmora_iskoristeno_insert AFTER INSERT ON dani_odmora BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno + 1
+                WHERE zaposlenik_rb = NEW.zaposlenik_rb AND godina = NEW.godina;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS dani_odmora_iskoristeno_delete AFTER DELETE ON dani_odmora BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno - 1
+                WHERE zaposlenik_rb = OLD.zaposlenik_rb AND godina = OLD.godina;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS dani_odmora_iskoristeno_update
+            AFTER UPDATE OF zaposlenik_rb, godina ON dani_odmora
+            WHEN OLD.zaposlenik_rb IS NOT NEW.zaposlenik_rb OR OLD.godina IS NOT NEW.godina BEGIN
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno - 1
+                WHERE zaposlenik_rb = OLD.zaposlenik_rb AND godina = OLD.godina;
+                UPDATE ukupno_dana SET iskoristeno = iskoristeno + 1
+                WHERE zaposlenik_rb = NEW.zaposlenik_rb AND godina = NEW.godina;
+            END;""",
+            "DROP TRIGGER IF EXISTS ukupno_dana_iskoristeno_insert;",
+            """CREATE TRIGGER IF NOT EXISTS ukupno_dana_iskoristeno_insert AFTER INSERT ON ukupno_dana BEGIN
+                UPDATE ukupno_dana SET iskoristeno = (
+                    SELECT count(*) FROM dani_odmora o
+                    WHERE o.zaposlenik_rb = NEW.zaposlenik_rb AND o.godina = NEW.godina)
+                WHERE rb = NEW.rb;
+            END;""",
+            """CREATE VIEW IF NOT EXISTS odmor AS
+            SELECT rb, zaposlenik_rb, date(dan - 0.5) AS datum, godina, napomena FROM dani_odmora;""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_insert INSTEAD OF INSERT ON odmor BEGIN
+                INSERT INTO dani_odmora (rb, zaposlenik_rb, dan, godina, napomena)
+                VALUES (NEW.rb, NEW.zaposlenik_rb, CAST(julianday(NEW.datum) + 0.5 AS INTEGER), NEW.godina,
+                        NEW.napomena);
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_update INSTEAD OF UPDATE ON odmor BEGIN
+                UPDATE dani_odmora SET zaposlenik_rb = NEW.zaposlenik_rb,
+                    dan = CAST(julianday(NEW.datum) + 0.5 AS INTEGER), godina = NEW.godina, napomena = NEW.napomena
+                WHERE rb = OLD.rb;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS odmor_delete INSTEAD OF DELETE ON odmor BEGIN
+                DELETE FROM dani_odmora WHERE rb = OLD.rb;
+            END;""",
+        ),
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    from PyQt5.QtCore import QCoreApplication
+
+    parser = argparse.ArgumentParser(description='Odrzavanje baze godisnjeg odmora')
+    parser.add_argument('--provjeri-brojace', action='store_true',
+                        help='provjera brojaca iskoristenih dana u tablici ukupno_dana')
+    parser.add_argument('--popravi', action='store_true', help='ponovno izracunaj neispravne brojace')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    app = QCoreApplication(sys.argv)
+    baza.postavi_nacin_dnevnika()
+    create_connection()
+    if args.provjeri_brojace or args.popravi:
+        broj = provjeri_brojace(popravi=args.popravi)
+        print(f'Neispravnih brojaca: {broj}')
@@ -9,16 +9,16 @@
     System type: "64-bit Operating System"
 """
 
+import argparse
+import logging
 import sys
 from datetime import datetime
 from traceback import format_exception
 
-from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtWidgets import QApplication
+from odmor.jezgra import baza
+from odmor.profil import ProfilPokretanja
 
-from database_create import create_connection
-from odmor import main_widget
-from resources import resources
+log = logging.getLogger('main_app')
 
 
 def exception_hook(exctype, value, traceback):
@@ -32,13 +32,53 @@ def exception_hook(exctype, value, traceback):
 
 sys.excepthook = exception_hook
 
-if __name__ == '__main__':
-    app = QApplication(sys.argv)
+
+def main():
+    # Qt, baza i glavni prozor ucitavaju se tek ovdje da ih profil pokretanja moze izmjeriti
+    parser = argparse.ArgumentParser(description='Evidencija godišnjeg odmora')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='ispis trajanja ucitavanja modula i koraka pokretanja')
+    parser.add_argument('--journal-mode', choices=baza.NACINI_DNEVNIKA,
+                        help='nacin dnevnika baze (zadano ODMOR_JOURNAL_MODE ili auto: WAL samo na lokalnom disku)')
+    args, _ = parser.parse_known_args()  # Ostale argumente obraduje QApplication
+    profil = ProfilPokretanja(aktivan=args.startup_profile)
+
+    logging.basicConfig(filename='app.log', level=logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    with profil.importi():
+        from PyQt5.QtGui import QFont, QIcon
+        from PyQt5.QtWidgets import QApplication
+
+        from odmor import main_widget, radnik
+
+    with profil.korak('QApplication'):
+        app = QApplication(sys.argv)
+    with profil.importi('resources'):  # Ikone su potrebne vec za prvi prikaz prozora
+        from resources import resources
     font = QFont('Arial', 10)
     app.setWindowIcon(QIcon(':icons/calendar.png'))
     app.setStyle('Fusion')
     app.setFont(font)
-    create_connection()
-    run = main_widget.CentralWidget()
-    run.show()
-    sys.exit(app.exec_())
+    baza.postavi_nacin_dnevnika(args.journal_mode)
+    app.aboutToQuit.connect(radnik.zaustavi)
+    # Prozor se prikazuje odmah, a baza se otvara i migrira u radniku pa se pregled puni po stranicama
+    with profil.korak('CentralWidget.__init__'):
+        run = main_widget.CentralWidget(baza_spremna=False)
+    with profil.korak('prvo iscrtavanje'):
+        run.show()
+        app.processEvents()
+    zavrsi_ucitavanje = profil.mjerenje('priprema baze i prva stranica pregleda')
+
+    def ucitano():
+        zavrsi_ucitavanje()
+        if args.startup_profile:
+            izvjestaj = profil.izvjestaj()
+            print(izvjestaj, flush=True)  # Bez konzole (PyInstaller) ostaje samo zapis u app.log
+            log.info('Profil pokretanja:\n%s', izvjestaj)
+
+    run.ucitaj_bazu(gotovo=ucitano)
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
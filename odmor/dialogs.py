@@ -1,50 +1,59 @@
-import json
 import os
-from datetime import timedelta, date
+from datetime import date, timedelta
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QIcon
-from PyQt5.QtSql import QSqlTableModel, QSqlQuery
-from pyexcelerate import Workbook
+from PyQt5.QtSql import QSqlTableModel
+
+from odmor import izvoz, kalendar, podaci, promjene, radnik
+from odmor.jezgra import izvjestaji
+
+
+class PeriodModel(QAbstractTableModel):
+    # Stupci su dani perioda, a redovi zaposlenici na odmoru taj dan. Celije se ne stvaraju unaprijed,
+    # ime se dohvaca tek kad pogled iscrtava celiju.
+    def __init__(self, pregled, parent=None):
+        super(PeriodModel, self).__init__(parent)
+        self.pregled = pregled
+        self.broj_redova = pregled.max_zaposlenika
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.broj_redova
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.pregled.broj_dana
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.pregled.datum(section).strftime('%d.%m.%Y.')
+        return super(PeriodModel, self).headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        zaposlenici = self.pregled.dani.get(index.column(), ())
+        if index.row() < len(zaposlenici):
+            return self.pregled.imena[zaposlenici[index.row()]]
+        return None
 
 
 class DialogPregledZaPeriod(QtWidgets.QDialog):
-    def __init__(self, period, parent=None):
+    def __init__(self, pregled, parent=None):
         super(DialogPregledZaPeriod, self).__init__(parent)
         self.setWindowFlags(Qt.WindowTitleHint | Qt.WindowCloseButtonHint | Qt.WindowMaximizeButtonHint)
         self.setWindowTitle('Pregled godišnjeg odmora')
         self.resize(840, 450)
-        self.zaposlenici = {}
-        sql = """select strftime('%d.%m.%Y.', o.datum), z.prezime || ' ' || z.ime as zaposlenik
-                    from zaposlenici z left join odmor o on z.rb = o.zaposlenik_rb
-                    where datum between '{}' and '{}';""".format(*[str(d) for d in period])
-
-        datum_od, datum_do = period
-        delta = timedelta(days=1)
-        while datum_od <= datum_do:  # Kreiranje stupaca s datumom za odabrani period
-            self.zaposlenici[datum_od.strftime('%d.%m.%Y.')] = []
-            datum_od += delta
-
-        query = QSqlQuery(sql)
-        query.exec_()
-        while query.next():  # Ključ je datum a vrijednost su zaposlenici koji su na taj dan bili na odmoru
-            self.zaposlenici[query.value(0)].append(query.value(1))
-
-        self.table = QtWidgets.QTableWidget()
-        self.table.setEditTriggers(QtWidgets.QTableWidget.NoEditTriggers)
-        self.table.setColumnCount(len(self.zaposlenici))
-        self.table.setHorizontalHeaderLabels(self.zaposlenici)
-
-        self.table.setRowCount(max([len(self.zaposlenici[x]) for x in self.zaposlenici]))
-        for col, datum in enumerate(self.zaposlenici):
-            for row, zaposlenik in enumerate(self.zaposlenici[datum]):
-                self.table.setItem(row, col, QtWidgets.QTableWidgetItem(str(zaposlenik)))
+        self.pregled = pregled
+
+        self.table = QtWidgets.QTableView()
+        self.table.setEditTriggers(QtWidgets.QTableView.NoEditTriggers)
+        self.table.setModel(PeriodModel(self.pregled, self))
 
         btn_zatvori = QtWidgets.QPushButton('Zatvori')
         btn_zatvori.clicked.connect(self.close)
 
-        btn_excel = QtWidgets.QPushButton('Izvoz u Excel')
+        btn_excel = QtWidgets.QPushButton('Izvoz')
         btn_excel.clicked.connect(self.export_to_excel)
 
         hbox = QtWidgets.QHBoxLayout()
@@ -58,57 +67,71 @@ class DialogPregledZaPeriod(QtWidgets.QDialog):
         self.setLayout(vlayout)
 
     def write_to_excel(self, fpath):
-        data = []
-        for key, val in self.zaposlenici.items():
-            data.append([key, *val])
-        wb = Workbook()
-        wb.new_sheet('Sheet1', data=data)
-        wb.save(fpath)
+        redovi = ([self.pregled.datum(stupac).strftime(izvjestaji.FORMAT_DATUMA), *self.pregled.zaposlenici(stupac)]
+                  for stupac in range(self.pregled.broj_dana))
+        izvjestaji.zapisi_xlsx(fpath, redovi)
 
     def export_to_excel(self):
         ftype = "Excel datoteka (*.xlsx)"
         today = str(date.today()).replace('-', '')
         init_path = os.path.expanduser(f"~/Desktop/Godišnji_{today}.xlsx")
-        fname = QtWidgets.QFileDialog.getSaveFileName(self, 'Spremi datoteku', init_path, ftype, ftype)[0]
+        fname, ftype = QtWidgets.QFileDialog.getSaveFileName(self, 'Spremi datoteku', init_path,
+                                                             ';;'.join(izvoz.VRSTE_IZVOZA), ftype)
         if fname:
-            if not fname.endswith('.xlsx'):
-                fname += '.xlsx'
-            self.write_to_excel(fname)
+            vrsta, ekstenzija = izvoz.VRSTE_IZVOZA.get(ftype, (izvjestaji.XLSX, '.xlsx'))
+            if not fname.endswith(ekstenzija):
+                fname += ekstenzija
+            self.izvezi(fname, vrsta)
+
+    def izvezi(self, fname, vrsta):
+        progress = QtWidgets.QProgressDialog('Izvoz u tijeku...', 'Odustani', 0, 0, self)
+        progress.setWindowTitle('Izvoz')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.izvoz = izvoz.IzvozThread((self.pregled.datum_od, self.pregled.datum_do), fname, vrsta, self)
+        self.izvoz.ukupno.connect(progress.setMaximum)
+        self.izvoz.napredak.connect(progress.setValue)
+        self.izvoz.greska.connect(lambda tekst: QtWidgets.QMessageBox.critical(self, 'Izvoz', tekst))
+        self.izvoz.finished.connect(progress.close)
+        progress.canceled.connect(self.izvoz.requestInterruption)
+        self.izvoz.start()
 
     @staticmethod
     def exec_dialog():
         period = DialogPeriod()
         if period.exec_():
-            dialog = DialogPregledZaPeriod(period.get_dates())
-            dialog.exec_()
+            radnik.posalji(podaci.pregled_za_period, *period.get_dates(),
+                           gotovo=lambda pregled: DialogPregledZaPeriod(pregled).exec_(),
+                           greska=lambda tekst: QtWidgets.QMessageBox.critical(None, 'Pregled', tekst))
 
 
 class DialogPeriod(QtWidgets.QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, naslov='Pregled godišnjeg odmora', gumb='Prikaži', isti_dan=False, parent=None):
         super(DialogPeriod, self).__init__(parent, Qt.WindowTitleHint | Qt.WindowCloseButtonHint)
+        self.isti_dan = isti_dan  # Dopusten period od jednog dana
         self.setWindowTitle('Period')
         self.setFixedSize(250, 130)
 
-        praznici = KalendarWidget.load_praznici()
         current_date = QDate.currentDate()
         self.datum_od = QtWidgets.QDateEdit()
         self.datum_od.setCalendarPopup(True)
-        self.datum_od.setCalendarWidget(KalendarWidget(praznici))
+        self.datum_od.setCalendarWidget(KalendarWidget())
         self.datum_od.setAlignment(Qt.AlignCenter)
         self.datum_od.setDate(current_date)
 
         self.datum_do = QtWidgets.QDateEdit()
         self.datum_do.setCalendarPopup(True)
-        self.datum_do.setCalendarWidget(KalendarWidget(praznici))
+        self.datum_do.setCalendarWidget(KalendarWidget())
         self.datum_do.setAlignment(Qt.AlignCenter)
         self.datum_do.setDate(current_date.addDays(7))
 
-        lbl_naslov = QtWidgets.QLabel('Pregled godišnjeg odmora')
+        lbl_naslov = QtWidgets.QLabel(naslov)
         font = lbl_naslov.font()
         font.setPointSize(11)
         lbl_naslov.setFont(font)
 
-        btn_prikaz = QtWidgets.QPushButton('Prikaži')
+        btn_prikaz = QtWidgets.QPushButton(gumb)
 
         form_layout = QtWidgets.QFormLayout()
         form_layout.setVerticalSpacing(5)
@@ -122,7 +145,7 @@ class DialogPeriod(QtWidgets.QDialog):
         btn_prikaz.clicked.connect(self.validate_dates)
 
     def validate_dates(self):
-        if self.datum_od.date() < self.datum_do.date():
+        if self.datum_od.date() < self.datum_do.date() or self.isti_dan and self.datum_od.date() == self.datum_do.date():
             return self.accept()
         QtWidgets.QToolTip.showText(self.mapToGlobal(self.datum_do.pos()), 'Neispravan unos')
 
@@ -208,12 +231,14 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
         self.resize(800, 450)
         self.setWindowTitle(f'Pregled i unos godišnjeg - {zaposlenik[1]} {zaposlenik[2]}')
         self.zaposlenik_rb = zaposlenik[0]
-        self.ukupno_dana = zaposlenik[3]
         self.godina = godina
+        self.stanje = None
+
+        self.lbl_stanje = QtWidgets.QLabel()
 
         self.model = SqlTableModel()
         self.model.setEditStrategy(QSqlTableModel.OnManualSubmit)
-        self.model.setTable('odmor')
+        self.model.setTable('dani_odmora')
 
         self.table = QtWidgets.QTableView()
         self.table.verticalHeader().setFixedWidth(40)
@@ -234,6 +259,9 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
 
         btn_novi = QtWidgets.QPushButton('Novi unos')
         btn_novi.setAutoDefault(False)
+        btn_period = QtWidgets.QPushButton('Unos perioda')
+        btn_period.setAutoDefault(False)
+        btn_period.setToolTip('Unos svih radnih dana u odabranom periodu')
         btn_izbrisi = QtWidgets.QPushButton('Izbriši')
         btn_izbrisi.setAutoDefault(False)
         btn_spremi = QtWidgets.QPushButton('Spremi')
@@ -243,9 +271,12 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
 
         hbox_btns = QtWidgets.QHBoxLayout()
         hbox_btns.addWidget(btn_novi)
+        hbox_btns.addWidget(btn_period)
         hbox_btns.addWidget(btn_izbrisi)
         hbox_btns.addWidget(btn_spremi)
         hbox_btns.addStretch()
+        hbox_btns.addWidget(self.lbl_stanje)
+        hbox_btns.addSpacing(10)
         hbox_btns.addWidget(btn_zatvori)
 
         vlayout = QtWidgets.QVBoxLayout()
@@ -254,9 +285,16 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
         self.setLayout(vlayout)
 
         btn_novi.clicked.connect(self.novi_unos)
+        btn_period.clicked.connect(self.unos_perioda)
         btn_izbrisi.clicked.connect(self.izbrisi_unos)
         btn_spremi.clicked.connect(self.spremi_promjene)
         btn_zatvori.clicked.connect(self.close)
+        self.osvjezi_stanje()
+
+    def osvjezi_stanje(self):
+        self.stanje = podaci.stanje_godisnjeg(self.zaposlenik_rb, self.godina)
+        self.lbl_stanje.setText(f'Ukupno: {self.stanje["ukupno"]}   Preneseno: {self.stanje["preneseno"]}   '
+                                f'Iskorišteno: {self.stanje["iskoristeno"]}   Preostalo: {self.stanje["preostalo"]}')
 
     def closeEvent(self, event):
         if self.model.isDirty():
@@ -264,14 +302,19 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
                                         'Neke od unesenih promjena nisu spremljene. \n\nŽelite li ih spremiti?')
             msg.addButton('Da', QtWidgets.QMessageBox.AcceptRole)
             msg.addButton('Ne', QtWidgets.QMessageBox.RejectRole)
-            if msg.exec_() == QtWidgets.QMessageBox.AcceptRole:
-                self.model.submitAll()
+            if msg.exec_() == QtWidgets.QMessageBox.AcceptRole and not self.spremi():
+                return event.ignore()
             self.model.revertAll()  # Da se ustanovi je li bilo promjena
         return super(DialogPregledGodisnjeg, self).closeEvent(event)
 
+    def nespremljeni_redovi(self, samo_novi=False):
+        # Novi retci imaju rb 0 dok se ne zapisu u bazu
+        return sum(self.model.isDirty(self.model.index(row, 0))
+                   and (not samo_novi or not self.model.record(row).value(0)) for row in range(self.model.rowCount()))
+
     def novi_unos(self):
-        last_row = self.model.rowCount()
-        if self.ukupno_dana > last_row:
+        if self.stanje['preostalo'] > self.nespremljeni_redovi(samo_novi=True):
+            last_row = self.model.rowCount()
             self.table.setFocus()
             self.model.insertRow(last_row)
             self.model.setData(self.model.index(last_row, 1), self.zaposlenik_rb)
@@ -281,6 +324,20 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
         QtWidgets.QMessageBox().critical(None, 'Iskorišten godišnji',
                                          'Zaposlenik je iskoristio sve dane godišnjeg odmora', QtWidgets.QMessageBox.Ok)
 
+    def unos_perioda(self):
+        if self.model.isDirty():
+            return QtWidgets.QMessageBox().critical(None, 'Unos perioda', 'Spremite promjene prije unosa perioda',
+                                                    QtWidgets.QMessageBox.Ok)
+        period = DialogPeriod('Unos godišnjeg odmora', 'Unesi', isti_dan=True, parent=self)
+        if period.exec_():
+            radnik.posalji(podaci.unesi_odmor, self.zaposlenik_rb, self.godina, *period.get_dates(),
+                           gotovo=self.period_unesen,
+                           greska=lambda tekst: QtWidgets.QMessageBox.critical(self, 'Unos perioda', tekst))
+
+    def period_unesen(self, _):
+        self.model.select()
+        self.osvjezi_stanje()
+
     def spremi_promjene(self):
         dates = [self.model.data(self.model.index(row, 2)) for row in range(self.model.rowCount())]
         if not self.model.isDirty():
@@ -288,65 +345,81 @@ class DialogPregledGodisnjeg(QtWidgets.QDialog):
         if len(dates) != len(set(dates)):  # Provjera unique vrijednosti
             return QtWidgets.QMessageBox().critical(None, 'Duplicirana vrijednost', 'Uneseni datum već postoji ',
                                                     QtWidgets.QMessageBox.Ok)
-        self.model.submitAll()
+        self.spremi()
 
     def izbrisi_unos(self):
         selected = self.table.selectedIndexes()
         if selected:
             self.model.removeRow(selected[0].row())
-            self.model.submitAll()
+            self.spremi()
+
+    def spremi(self):
+        # Dani se zapisuju preko veze GUI dretve pa se promjena zaposlenika objavljuje ovdje. Kad spremanje ne
+        # uspije, retci prije neispravnog su vec zapisani, a ostali ostaju nespremljeni u modelu.
+        nespremljeno = self.nespremljeni_redovi()
+        spremljeno = self.model.submitAll()
+        if not spremljeno:
+            QtWidgets.QMessageBox.critical(self, 'Spremanje promjena',
+                                           f'Promjene nisu spremljene.\n\n{self.model.lastError().text()}')
+        if self.nespremljeni_redovi() < nespremljeno:
+            self.osvjezi_stanje()
+            promjene.objavi([self.zaposlenik_rb])
+        return spremljeno
 
 
 class DateColumnDelegate(QtWidgets.QStyledItemDelegate):
+    # Dan odmora je julijanski dan, u QDate i iz njega se pretvara bez parsiranja teksta
     def __init__(self, parent=None):
         super(DateColumnDelegate, self).__init__(parent)
         self.format = "dd.MM.yyyy"
-        self.praznici = KalendarWidget.load_praznici()  # Da se ne ucitava za svaku instancu zasebno
 
     def displayText(self, value, locale):
-        return QDate.fromString(value, "yyyy-MM-dd").toString(self.format)
+        return QDate.fromJulianDay(value).toString(self.format) if value else ''
 
     def createEditor(self, parent, option, index):
         dateedit = QtWidgets.QDateEdit(parent)
         dateedit.setDisplayFormat(self.format)
         dateedit.setCalendarPopup(True)
-        dateedit.setCalendarWidget(KalendarWidget(self.praznici))
+        dateedit.setCalendarWidget(KalendarWidget())
         dateedit.setAlignment(Qt.AlignCenter)
         return dateedit
 
     def setEditorData(self, editor, index):
-        value = index.data(Qt.DisplayRole)
-        editor.setDate(QDate.fromString(value, "yyyy-MM-dd") if value else QDate().currentDate())
+        value = index.data(Qt.EditRole)
+        editor.setDate(QDate.fromJulianDay(value) if value else QDate().currentDate())
 
     def setModelData(self, editor, model, index):
-        date = editor.date().toString('yyyy-MM-dd')
-        model.setData(index, date)
+        model.setData(index, editor.date().toJulianDay())
 
 
 class KalendarWidget(QtWidgets.QCalendarWidget):
-    def __init__(self, praznici=None, parent=None):
+    # Praznici se oznacavaju samo na prikazanoj stranici kalendara, a formati su zajednicki svim kalendarima
+    formati = {}  # redni broj dana: QTextCharFormat
+
+    def __init__(self, parent=None):
         super(KalendarWidget, self).__init__(parent)
         self.setVerticalHeaderFormat(QtWidgets.QCalendarWidget.NoVerticalHeader)
-        self.praznici = praznici or {}
-        if not self.praznici:
-            self.praznici = self.load_praznici()
-        self.postavi_praznike()
-
-    @staticmethod
-    def load_praznici():
-        try:  # Vraca rijecnik praznika ako postoji, inace prazan rijecnik
-            with open('holidays.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-
-    def postavi_praznike(self):
-        char_format = self.weekdayTextFormat(Qt.Saturday)
-        for datum, tekst in self.praznici.items():
-            char_format.setToolTip(tekst)
+        self.oznaceni = set()  # (godina, mjesec) vec oznacenih stranica
+        self.currentPageChanged.connect(self.postavi_praznike)
+        self.postavi_praznike(self.yearShown(), self.monthShown())
+
+    def postavi_praznike(self, godina, mjesec):
+        if (godina, mjesec) in self.oznaceni:
+            return
+        self.oznaceni.add((godina, mjesec))
+        prvi = date(godina, mjesec, 1)  # Stranica prikazuje i dane susjednih mjeseci
+        for datum, naziv in kalendar.kalendar().praznici_u_periodu(prvi - timedelta(days=7), prvi + timedelta(days=42)):
+            self.setDateTextFormat(QDate(datum), self.format_praznika(datum, naziv))
+
+    def format_praznika(self, datum, naziv):
+        redni = datum.toordinal()
+        if redni not in self.formati:
+            char_format = self.weekdayTextFormat(Qt.Saturday)
+            char_format.setToolTip(naziv)
             char_format.setFontUnderline(True)
             char_format.setUnderlineColor(Qt.red)
-            self.setDateTextFormat(QDate.fromString(datum, Qt.ISODate), char_format)
+            self.formati[redni] = char_format
+        return self.formati[redni]
 
 
 # Onemogucava izmjenu godine
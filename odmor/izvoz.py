@@ -0,0 +1,46 @@
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from odmor.jezgra import baza, izvjestaji
+from odmor.jezgra.izvjestaji import CSV, XLSX, XLSX_PO_ZAPOSLENIKU, IzvozPrekinut
+
+VRSTE_IZVOZA = {  # Filter dijaloga za spremanje: (vrsta izvoza, ekstenzija)
+    'Excel datoteka (*.xlsx)': (XLSX, '.xlsx'),
+    'Excel datoteka, list po zaposleniku (*.xlsx)': (XLSX_PO_ZAPOSLENIKU, '.xlsx'),
+    'CSV datoteka (*.csv)': (CSV, '.csv'),
+}
+
+
+class IzvozThread(QThread):
+    # Izvoz se izvodi izvan GUI dretve s vlastitom vezom na bazu samo za citanje, retci se citaju izravno iz upita
+    ukupno = pyqtSignal(int)
+    napredak = pyqtSignal(int)
+    greska = pyqtSignal(str)
+
+    def __init__(self, period, fpath, vrsta=XLSX, parent=None):
+        super(IzvozThread, self).__init__(parent)
+        self.datum_od, self.datum_do = period
+        self.fpath = fpath
+        self.vrsta = vrsta
+
+    def run(self):
+        try:
+            veza = baza.otvori(samo_citanje=True)
+        except Exception as e:
+            return self.greska.emit(str(e))
+        try:
+            izvjestaji.izvezi_period(veza, self.datum_od, self.datum_do, self.fpath, self.vrsta,
+                                     ukupno=self.ukupno.emit, napredak=self.procitano)
+        except IzvozPrekinut:  # Prekinuti CSV je djelomicno zapisan pa se brise
+            if self.vrsta == CSV and os.path.exists(self.fpath):
+                os.remove(self.fpath)
+        except Exception as e:
+            self.greska.emit(str(e))
+        finally:
+            veza.close()
+
+    def procitano(self, broj):
+        if self.isInterruptionRequested():
+            raise IzvozPrekinut()
+        self.napredak.emit(broj)
@@ -0,0 +1,81 @@
+import os
+from contextlib import contextmanager
+
+dbase_name = 'odmorzap.db'
+
+# Postavke koje se primjenjuju na svaku vezu (Qt i sqlite3). Nacin dnevnika i synchronous postavlja
+# postavi_nacin_dnevnika, zadani DELETE radi i na mreznom disku.
+pragme = {
+    'foreign_keys': 'ON',
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -32000,  # Negativna vrijednost je velicina u KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+busy_timeout = 5000  # ms cekanja na zakljucanu bazu prije greske
+
+NACINI_DNEVNIKA = ('auto', 'wal', 'delete')
+MREZNI_DATOTECNI_SUSTAVI = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p', 'afs')
+
+
+def postavi_nacin_dnevnika(nacin=None, putanja=None):
+    # Nacin se zadaje argumentom, varijablom okruzenja ODMOR_JOURNAL_MODE ili je auto. WAL koristi indeks u
+    # dijeljenoj memoriji koji ne radi izmedu racunala, pa ga auto ukljucuje samo za bazu na lokalnom disku.
+    nacin = (nacin or os.environ.get('ODMOR_JOURNAL_MODE') or 'auto').lower()
+    if nacin not in NACINI_DNEVNIKA:
+        raise Exception(f'Nepoznat nacin dnevnika {nacin}, dopusteno je {", ".join(NACINI_DNEVNIKA)}')
+    if nacin == 'auto':
+        nacin = 'delete' if mrezni_disk(putanja or dbase_name) else 'wal'
+    pragme['journal_mode'] = nacin.upper()
+    # U WAL nacinu fsync se radi pri checkpointu, a ne pri svakom commitu
+    pragme['synchronous'] = 'NORMAL' if nacin == 'wal' else 'FULL'
+    return pragme['journal_mode']
+
+
+def mrezni_disk(putanja):
+    # Disk cija se vrsta ne moze utvrditi smatra se mreznim
+    if putanja.startswith(('\\\\', '//')):  # UNC putanja
+        return True
+    putanja = os.path.realpath(putanja)
+    if os.name == 'nt':
+        import ctypes
+
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(putanja)[0] + '\\') == 4  # DRIVE_REMOTE
+    try:
+        with open('/proc/mounts') as f:
+            tocke = [red.split()[1:3] for red in f]
+    except OSError:
+        return True
+    direktorij = os.path.dirname(putanja)
+    tocke = [(tocka, sustav) for tocka, sustav in tocke
+             if direktorij == tocka or direktorij.startswith(tocka.rstrip('/') + '/')]
+    return not tocke or max(tocke, key=lambda ts: len(ts[0]))[1] in MREZNI_DATOTECNI_SUSTAVI
+
+
+def otvori(putanja=None, samo_citanje=False, check_same_thread=True):
+    # Veza bez Qt-a (sqlite3) s istim postavkama kao veze aplikacije. Transakcije se zapocinju izricito.
+    # sqlite3 se ucitava tek ovdje jer GUI radi preko QtSql, a postavke iz ovog modula ucitava pri pokretanju.
+    import sqlite3
+    from pathlib import Path
+
+    uri = Path(putanja or dbase_name).absolute().as_uri()
+    veza = sqlite3.connect(f'{uri}?mode={"ro" if samo_citanje else "rw"}', uri=True, isolation_level=None,
+                           check_same_thread=check_same_thread, timeout=busy_timeout / 1000)
+    for pragma, vrijednost in pragme.items():
+        if samo_citanje and pragma == 'journal_mode':  # Nacin dnevnika se zapisuje u bazu
+            continue
+        veza.execute(f'PRAGMA {pragma} = {vrijednost};')
+    return veza
+
+
+@contextmanager
+def transakcija(veza, ponisti=False):
+    # Greska ponistava transakciju. Proba (ponisti) izvrsava sve naredbe pa ih ponistava.
+    veza.execute('BEGIN IMMEDIATE;')
+    try:
+        yield veza
+    except BaseException:
+        veza.execute('ROLLBACK;')
+        raise
+    veza.execute('ROLLBACK;' if ponisti else 'COMMIT;')
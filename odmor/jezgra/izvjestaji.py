@@ -0,0 +1,132 @@
+import csv
+import json
+import re
+from datetime import timedelta
+from itertools import chain, groupby
+
+from odmor.jezgra.repozitoriji import Odmor, UkupnoDana
+from odmor.kalendar import iz_julijanskog_dana
+
+FORMAT_DATUMA = '%d.%m.%Y.'
+XLSX, XLSX_PO_ZAPOSLENIKU, CSV, JSON = range(4)
+ZAGLAVLJE_GODISNJEG = ('Rb', 'Prezime', 'Ime', 'Ukupno dana', 'Preneseno', 'Iskorišteno', 'Preostalo', 'Dani')
+NAPREDAK_SVAKIH = 500  # Broj procitanih redaka izmedu dvije dojave napretka
+
+
+class IzvozPrekinut(Exception):
+    pass
+
+
+def redovi_po_danima(redovi, datum_od, datum_do):
+    # Retke (julijanski dan, zaposlenik) poredane po danu pretvara u retke izvjestaja [datum, zaposlenici...].
+    # Dani bez ijednog zaposlenika na odmoru ostaju u izvjestaju samo s datumom.
+    datum = datum_od
+    for julijanski_dan, grupa in groupby(redovi, key=lambda red: red[0]):
+        dan = iz_julijanskog_dana(julijanski_dan)
+        while datum < dan:
+            yield [datum.strftime(FORMAT_DATUMA)]
+            datum += timedelta(days=1)
+        yield [dan.strftime(FORMAT_DATUMA), *(red[1] for red in grupa)]
+        datum = dan + timedelta(days=1)
+    while datum <= datum_do:
+        yield [datum.strftime(FORMAT_DATUMA)]
+        datum += timedelta(days=1)
+
+
+def zapisi_xlsx(fpath, redovi):
+    from pyexcelerate import Workbook  # Ucitava se tek kad zatreba, izvjestaji bez Excela pocinju brze
+
+    wb = Workbook()
+    ws = wb.new_sheet('Sheet1')
+    for x, red in enumerate(redovi, start=1):
+        for y, vrijednost in enumerate(red, start=1):
+            ws.set_cell_value(x, y, vrijednost)
+    wb.save(fpath)
+
+
+def zapisi_xlsx_po_zaposleniku(fpath, redovi):
+    # Retke (rb, zaposlenik, julijanski dan) poredane po zaposleniku zapisuje na zaseban list za svakog zaposlenika
+    from pyexcelerate import Workbook
+
+    wb = Workbook()
+    nazivi = set()
+    for (rb, zaposlenik), grupa in groupby(redovi, key=lambda red: red[:2]):
+        ws = wb.new_sheet(naziv_lista(zaposlenik, nazivi))
+        ws.set_cell_value(1, 1, zaposlenik)
+        for x, red in enumerate(grupa, start=2):
+            ws.set_cell_value(x, 1, iz_julijanskog_dana(red[2]).strftime(FORMAT_DATUMA))
+    if not nazivi:
+        wb.new_sheet('Sheet1')
+    wb.save(fpath)
+
+
+def zapisi_csv(fpath, redovi):
+    with open(fpath, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerows(redovi)
+
+
+def zapisi_json(fpath, zapisi):
+    # Lista JSON objekata zapisuje se jedan po jedan, bez cijelog izvjestaja u memoriji
+    with open(fpath, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for broj, zapis in enumerate(zapisi):
+            f.write((',\n' if broj else '\n') + json.dumps(zapis, ensure_ascii=False))
+        f.write('\n]\n')
+
+
+def naziv_lista(zaposlenik, nazivi):
+    # Excel dopusta najvise 31 znak u nazivu lista, bez znakova []:*?/\ i bez ponavljanja naziva
+    osnova = re.sub(r'[\[\]:*?/\\]', '', zaposlenik)[:31] or 'Zaposlenik'
+    naziv, broj = osnova, 1
+    while naziv.lower() in nazivi:
+        broj += 1
+        naziv = f'{osnova[:31 - len(str(broj)) - 1]} {broj}'
+    nazivi.add(naziv.lower())
+    return naziv
+
+
+def uz_napredak(redovi, napredak):
+    # napredak(broj procitanih) se poziva svakih NAPREDAK_SVAKIH redaka i na kraju. Prekida se tako da
+    # napredak digne IzvozPrekinut.
+    procitano = 0
+    for red in redovi:
+        yield red
+        procitano += 1
+        if napredak is not None and procitano % NAPREDAK_SVAKIH == 0:
+            napredak(procitano)
+    if napredak is not None:
+        napredak(procitano)
+
+
+def izvezi_period(veza, datum_od, datum_do, fpath, vrsta=XLSX, ukupno=None, napredak=None):
+    # Izvjestaj za period se pise izravno iz kursora, bez medurezultata u memoriji
+    odmor = Odmor(veza)
+    if ukupno is not None:
+        ukupno(odmor.broj_dana(datum_od, datum_do))
+    if vrsta == XLSX_PO_ZAPOSLENIKU:
+        return zapisi_xlsx_po_zaposleniku(fpath, uz_napredak(odmor.po_zaposlenicima(datum_od, datum_do), napredak))
+    redovi = uz_napredak(odmor.po_danima(datum_od, datum_do), napredak)
+    if vrsta == JSON:  # Samo dani u kojima je netko na odmoru
+        return zapisi_json(fpath, ({'datum': str(iz_julijanskog_dana(dan)), 'zaposlenici': [red[1] for red in grupa]}
+                                   for dan, grupa in groupby(redovi, key=lambda red: red[0])))
+    redovi = redovi_po_danima(redovi, datum_od, datum_do)
+    if vrsta == CSV:
+        zapisi_csv(fpath, redovi)
+    else:
+        zapisi_xlsx(fpath, redovi)
+
+
+def izvezi_godinu(veza, godina, fpath, vrsta=XLSX):
+    # Godisnji izvjestaj ima redak po zaposleniku sa stanjem godisnjeg i popisom dana odmora
+    redovi = ((*red[:7], [iz_julijanskog_dana(int(dan)) for dan in red[7].split(',')] if red[7] else [])
+              for red in UkupnoDana(veza).godisnji_izvjestaj(godina))
+    if vrsta == JSON:
+        kljucevi = ('rb', 'prezime', 'ime', 'ukupno', 'preneseno', 'iskoristeno', 'preostalo', 'dani')
+        return zapisi_json(fpath, (dict(zip(kljucevi, (*red[:7], list(map(str, red[7]))))) for red in redovi))
+    redovi = chain([ZAGLAVLJE_GODISNJEG], (
+        [*red[:7], ', '.join(datum.strftime(FORMAT_DATUMA) for datum in red[7])] for red in redovi))
+    if vrsta == CSV:
+        zapisi_csv(fpath, redovi)
+    else:
+        zapisi_xlsx(fpath, redovi)
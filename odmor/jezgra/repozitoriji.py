@@ -0,0 +1,103 @@
+import time
+from array import array
+from datetime import timedelta
+
+from odmor import kalendar, upiti
+from odmor.jezgra.baza import transakcija
+
+STUPCI_PREGLEDA = ('rb', 'ime', 'prezime', 'br_dana', 'iskoristeno', 'preneseno', 'preostalo')
+STUPCI_STANJA = ('ukupno', 'preneseno', 'iskoristeno', 'preostalo')
+
+# Repozitoriji koriste servis, skupni izvjestaji i mjerenje brzine. GUI radi preko QtSql (odmor.podaci) s istim
+# upitima (odmor.upiti) i pravilima unosa (dani_za_unos).
+
+
+class PregledZaPeriod:
+    # Stupac je redni broj dana u periodu, za svaki dan se cuva samo niz rb zaposlenika na odmoru
+    def __init__(self, datum_od, datum_do):
+        self.datum_od = datum_od
+        self.datum_do = datum_do
+        self.broj_dana = (datum_do - datum_od).days + 1
+        self.prvi_dan = kalendar.julijanski_dan(datum_od)
+        self.dani = {}  # redni broj dana: array rb zaposlenika
+        self.imena = {}  # rb zaposlenika: 'Prezime Ime'
+
+    def datum(self, stupac):
+        return self.datum_od + timedelta(days=stupac)
+
+    def zaposlenici(self, stupac):
+        return [self.imena[rb] for rb in self.dani.get(stupac, ())]
+
+    @property
+    def max_zaposlenika(self):
+        return max(map(len, self.dani.values()), default=0)
+
+    def dodaj_dan(self, dan, rbovi):
+        self.dani[dan - self.prvi_dan] = array('l', map(int, rbovi.split(',')))
+
+
+def period_dana(datum_od, datum_do):
+    # Vrijednosti upita za period, prvi i zadnji julijanski dan
+    return {'dan_od': kalendar.julijanski_dan(datum_od), 'dan_do': kalendar.julijanski_dan(datum_do)}
+
+
+def dani_za_unos(datum_od, datum_do, uneseni, preostalo):
+    # Radni dani perioda koji vec nisu uneseni (julijanski dani). Ako ih je vise od preostalih dana, nista se ne unosi.
+    dani = [dan for dan in map(kalendar.julijanski_dan, kalendar.kalendar().radni_dani(datum_od, datum_do))
+            if dan not in uneseni]
+    if len(dani) > preostalo:
+        raise Exception(f'Period sadrži {len(dani)} radnih dana, a zaposleniku je preostalo {preostalo}')
+    return dani
+
+
+class Zaposlenici:
+    def __init__(self, veza):
+        self.veza = veza
+
+    def stranica(self, godina, zadnji_rb=0, limit=100, pretraga=''):
+        uvjet, vrijednosti = upiti.uvjet_pretrage(pretraga)
+        return self.veza.execute(upiti.PREGLED_ZAPOSLENIKA.format(pretraga=uvjet),
+                                 dict(godina=godina, zadnji_rb=zadnji_rb, limit=limit, **vrijednosti)).fetchall()
+
+
+class UkupnoDana:
+    # Broj dana godisnjeg po zaposleniku i godini, s brojacem iskoristenih dana
+    def __init__(self, veza):
+        self.veza = veza
+
+    def stanje(self, rb, godina):
+        red = self.veza.execute(upiti.STANJE_GODISNJEG, {'rb': rb, 'godina': godina}).fetchone()
+        return dict(zip(STUPCI_STANJA, red or (0,) * len(STUPCI_STANJA)))
+
+    def godisnji_izvjestaj(self, godina):
+        # Kursor redaka (rb, prezime, ime, ukupno, preneseno, iskoristeno, preostalo, julijanski dani odvojeni zarezom)
+        return self.veza.execute(upiti.GODISNJI_IZVJESTAJ, {'godina': godina})
+
+    def otvori_godinu(self, godina, prenesi=False, proba=False):
+        pocetak = time.perf_counter()
+        vrijednosti = {'godina': godina, 'prenesi': int(prenesi)}
+        with transakcija(self.veza, ponisti=proba):
+            redova = self.veza.execute(upiti.OTVORI_GODINU, vrijednosti).rowcount
+            preneseno = self.veza.execute(upiti.PRENESENO_U_GODINI, vrijednosti).fetchone()[0]
+        return {'redova': redova, 'preneseno': preneseno, 'trajanje': time.perf_counter() - pocetak}
+
+
+class Odmor:
+    # Dani godisnjeg odmora
+    def __init__(self, veza):
+        self.veza = veza
+
+    def dani(self, rb, godina):
+        return [str(kalendar.iz_julijanskog_dana(red[0]))
+                for red in self.veza.execute(upiti.DANI_ODMORA_ZAPOSLENIKA, {'rb': rb, 'godina': godina})]
+
+    def broj_dana(self, datum_od, datum_do):
+        return self.veza.execute(upiti.BROJ_DANA_ODMORA_ZA_PERIOD, period_dana(datum_od, datum_do)).fetchone()[0]
+
+    def po_danima(self, datum_od, datum_do):
+        # Kursor redaka (julijanski dan, zaposlenik) poredanih po danu
+        return self.veza.execute(upiti.IZVOZ_PO_DANIMA, period_dana(datum_od, datum_do))
+
+    def po_zaposlenicima(self, datum_od, datum_do):
+        # Kursor redaka (rb, zaposlenik, julijanski dan) poredanih po zaposleniku
+        return self.veza.execute(upiti.IZVOZ_PO_ZAPOSLENICIMA, period_dana(datum_od, datum_do))
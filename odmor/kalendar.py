@@ -0,0 +1,145 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+HOLIDAYS_FILE = 'holidays.json'
+
+# Blagdani i praznici s fiksnim datumom: (mjesec, dan, naziv, od godine, do godine)
+FIKSNI_PRAZNICI = (
+    (1, 1, 'Nova godina', 1, 9999),
+    (1, 6, 'Sveta tri kralja (Bogojavljenje)', 2002, 9999),
+    (5, 1, 'Praznik rada', 1, 9999),
+    (5, 30, 'Dan državnosti', 2020, 9999),
+    (6, 22, 'Dan antifašističke borbe', 1991, 9999),
+    (6, 25, 'Dan državnosti', 1991, 2019),
+    (8, 5, 'Dan pobjede i domovinske zahvalnosti', 1995, 9999),
+    (8, 15, 'Velika Gospa', 1, 9999),
+    (10, 8, 'Dan neovisnosti', 2002, 2019),
+    (11, 1, 'Dan svih svetih', 1, 9999),
+    (11, 18, 'Dan sjećanja na žrtve Domovinskog rata', 2020, 9999),
+    (12, 25, 'Božić', 1, 9999),
+    (12, 26, 'Sveti Stjepan', 1, 9999),
+)
+
+# Pomicni blagdani: (broj dana od Uskrsa, naziv, od godine)
+POMICNI_PRAZNICI = (
+    (0, 'Uskrs', 1),
+    (1, 'Uskrsni ponedjeljak', 1),
+    (60, 'Tijelovo', 2002),
+)
+
+
+def uskrs(godina):
+    # Gregorijanski computus (anonimni algoritam, Meeus/Jones/Butcher)
+    a, b, c = godina % 19, godina // 100, godina % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mjesec, dan = divmod(h + l - 7 * m + 114, 31)
+    return date(godina, mjesec, dan + 1)
+
+
+def izracunati_praznici(godina):
+    praznici = {date(godina, mjesec, dan): naziv
+                for mjesec, dan, naziv, od, do in FIKSNI_PRAZNICI if od <= godina <= do}
+    for pomak, naziv, od in POMICNI_PRAZNICI:
+        if godina >= od:
+            praznici[uskrs(godina) + timedelta(days=pomak)] = naziv
+    return praznici
+
+
+# Dani odmora u bazi su julijanski dani, isti broj daju QDate.toJulianDay() i SQLite julianday(datum) + 0.5
+JULIJANSKI_POMAK = 1721425  # julijanski dan - date.toordinal()
+
+
+def julijanski_dan(datum):
+    return datum.toordinal() + JULIJANSKI_POMAK
+
+
+def iz_julijanskog_dana(dan):
+    return date.fromordinal(dan - JULIJANSKI_POMAK)
+
+
+class Godina:
+    # Neradni dani jedne godine kao bitmapa po danu u godini i sortirani redni brojevi praznika
+    def __init__(self, godina, praznici):
+        self.prvi = date(godina, 1, 1).toordinal()
+        self.nazivi = {datum.toordinal(): naziv for datum, naziv in praznici.items()}
+        self.redni = sorted(self.nazivi)
+        self.radnim_danom = [r for r in self.redni if date.fromordinal(r).weekday() < 5]
+        self.neradni = bytearray(366)
+        for r in self.redni:
+            self.neradni[r - self.prvi] = 1
+
+
+class RadniKalendar:
+    # Praznici se racunaju po pravilima za svaku godinu tek kad zatreba i pamte se. Datoteka praznika je
+    # sloj izmjena: datum iz datoteke dodaje praznik ili mijenja naziv, a prazan naziv uklanja praznik.
+    # Broj radnih dana u periodu racuna se iz broja tjedana umanjenog za praznike koji padaju radnim danom.
+    def __init__(self, izmjene=None):
+        self.izmjene = {}  # godina: {date: naziv}
+        for datum, naziv in (izmjene or {}).items():
+            self.izmjene.setdefault(datum.year, {})[datum] = naziv
+        self.godine = {}
+
+    @classmethod
+    def iz_datoteke(cls, fpath=HOLIDAYS_FILE):
+        import json  # Ucitava se tek s prvim kalendarom, prozor se iscrtava bez njega
+
+        try:
+            with open(fpath, 'r', encoding='utf-8') as f:
+                return cls({date.fromisoformat(datum): naziv for datum, naziv in json.load(f).items()})
+        except FileNotFoundError:
+            return cls()
+
+    def godina(self, godina):
+        if godina not in self.godine:
+            praznici = izracunati_praznici(godina)
+            praznici.update(self.izmjene.get(godina, {}))
+            self.godine[godina] = Godina(godina, {datum: naziv for datum, naziv in praznici.items() if naziv})
+        return self.godine[godina]
+
+    def je_praznik(self, datum):
+        g = self.godina(datum.year)
+        return g.neradni[datum.toordinal() - g.prvi] == 1
+
+    def je_radni_dan(self, datum):
+        return datum.weekday() < 5 and not self.je_praznik(datum)
+
+    def broj_radnih_dana(self, datum_od, datum_do):
+        # Ukljucuje oba datuma. Od pocetka tjedna (ponedjeljak) do datuma ima 5 radnih dana po tjednu.
+        if datum_do < datum_od:
+            return 0
+        def radnih_do(redni):  # Radni dani (bez praznika) od ponedjeljka 1.1.0001. do dana prije zadanog
+            tjedana, ostatak = divmod(redni - 1, 7)
+            return tjedana * 5 + min(ostatak, 5)
+        od, do = datum_od.toordinal(), datum_do.toordinal()
+        praznika = sum(bisect_right(g.radnim_danom, do) - bisect_left(g.radnim_danom, od)
+                       for g in map(self.godina, range(datum_od.year, datum_do.year + 1)))
+        return radnih_do(do + 1) - radnih_do(od) - praznika
+
+    def radni_dani(self, datum_od, datum_do):
+        dani = (datum_od + timedelta(days=i) for i in range((datum_do - datum_od).days + 1))
+        return [datum for datum in dani if self.je_radni_dan(datum)]
+
+    def praznici_u_periodu(self, datum_od, datum_do):
+        # (datum, naziv) praznika u periodu, za oznacavanje praznika na kalendaru
+        praznici = []
+        for g in map(self.godina, range(datum_od.year, datum_do.year + 1)):
+            pocetak = bisect_left(g.redni, datum_od.toordinal())
+            kraj = bisect_right(g.redni, datum_do.toordinal())
+            praznici.extend((date.fromordinal(r), g.nazivi[r]) for r in g.redni[pocetak:kraj])
+        return praznici
+
+
+_kalendar = None
+
+
+def kalendar():
+    # Jedan kalendar za cijelu aplikaciju, datoteka izmjena praznika se cita samo jednom
+    global _kalendar
+    if _kalendar is None:
+        _kalendar = RadniKalendar.iz_datoteke()
+    return _kalendar
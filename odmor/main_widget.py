@@ -1,15 +1,54 @@
+import logging
+import os
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 
-from PyQt5.QtCore import QSortFilterProxyModel, Qt, QSize
+from PyQt5.QtCore import QSortFilterProxyModel, Qt, QSize, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon
-from PyQt5.QtSql import QSqlQueryModel, QSqlQuery
 from PyQt5.QtWidgets import QTableView, QVBoxLayout, QLineEdit, QHBoxLayout, QSpinBox, QGroupBox, QLabel, QHeaderView
-from PyQt5.QtWidgets import QWidget, QPushButton, QMessageBox
+from PyQt5.QtWidgets import QWidget, QPushButton, QMessageBox, QApplication, QCheckBox, QFileDialog
 
-from odmor.dialogs import DialogUnosZaposlenika, DialogPregledGodisnjeg, DialogPregledZaPeriod
+import database_create
+from odmor import podaci, promjene, radnik
+from odmor.pracenje import PracenjeBaze
 
+log = logging.getLogger(__name__)
+# Dijalozi, izvoz i uvoz ucitavaju se tek kad se prvi put otvore, prozor se iscrtava bez njih
+
+
+class QueryModel(QAbstractTableModel):
+    # Zaposlenici se dohvacaju po stranicama (keyset po rb) dok ih pogled trazi pri pomicanju. Promjene
+    # objavljene nakon zapisa u bazu primjenjuju se samo na retke promijenjenih zaposlenika.
+    retci_osvjezeni = pyqtSignal(object)
+    zaglavlja = ('Rb', 'Ime', 'Prezime', 'Ukupno dana', 'Iskorišteno', 'Preneseno', 'Preostalo')
+    predohvat = 50  # Broj redaka koji se dohvaca ispod vidljivih
+    najvise_promjena = 500  # Vise promijenjenih zaposlenika (npr. uvoz) osvjezava se ponovnim ucitavanjem
+
+    def __init__(self, parent=None):
+        super(QueryModel, self).__init__(parent)
+        self.godina = None
+        self.pretraga = ''
+        self.redovi = []
+        self.rbovi = []  # rb zaposlenika po retcima, za trazenje retka
+        self.vidljivo_redova = 30
+        self.sve_dohvaceno = True
+        self.dohvat_u_tijeku = False
+        self.bez_stranica = False  # Svi retci se dohvacaju odjednom, potrebno za sortiranje u pogledu
+        self.na_cekanju = []  # Dohvati koji cekaju kraj dohvata u tijeku
+        self.generacija = 0
+        promjene.promjene().zaposlenici.connect(self.osvjezi_zaposlenike)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.redovi)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.zaglavlja)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.zaglavlja[section]
+        return super(QueryModel, self).headerData(section, orientation, role)
 
-class QueryModel(QSqlQueryModel):
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid() or role not in (Qt.DisplayRole, Qt.TextAlignmentRole):
             return None
@@ -17,34 +56,152 @@ class QueryModel(QSqlQueryModel):
             if index.column() in (1, 2):
                 return Qt.AlignLeft | Qt.AlignVCenter
             return Qt.AlignCenter | Qt.AlignVCenter
-        return super(QueryModel, self).data(index, role)
+        return self.redovi[index.row()][index.column()]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.sve_dohvaceno and not self.dohvat_u_tijeku
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.dohvat_u_tijeku:
+            return
+        self.dohvati_dalje(self.vidljivo_redova + self.predohvat)
+
+    def dohvati_dalje(self, limit, gotovo=None):
+        # Sljedeca stranica iza ucitanih redaka. Dok je drugi dohvat u tijeku ceka se njegov kraj, inace bi
+        # oba dohvatila istu stranicu.
+        if self.dohvat_u_tijeku:
+            self.na_cekanju.append(lambda: self.dohvati_dalje(limit, gotovo))
+        elif not self.sve_dohvaceno:
+            self.dohvati(limit, self.redovi[-1][0] if self.redovi else 0, gotovo)
+        elif gotovo is not None:
+            gotovo()
+
+    def dohvati_sve(self, gotovo=None):
+        # Sortiranje u pogledu ispravno je samo nad svim retcima, pa se od tada ne dohvaca po stranicama
+        self.bez_stranica = True
+        self.dohvati_dalje(-1, gotovo)  # SQLite LIMIT -1 nema ogranicenja
+
+    def dohvati(self, limit, zadnji_rb, gotovo=None):
+        # Stranica se dohvaca u radniku. Odgovor za raniju godinu ili pretragu (starija generacija) se odbacuje.
+        self.dohvat_u_tijeku = True
+        generacija = self.generacija
+        radnik.posalji(podaci.stranica_zaposlenika, self.godina, zadnji_rb, limit, self.pretraga,
+                       gotovo=lambda redovi: self.stranica_dohvacena(generacija, limit, zadnji_rb, redovi, gotovo),
+                       greska=lambda tekst: self.stranica_neuspjela(generacija, tekst))
+
+    def stranica_neuspjela(self, generacija, tekst):
+        # Npr. baza zakljucana dulje od busy_timeout. Sljedeci dohvat (pomicanje, osvjezavanje) pokusava ponovo.
+        log.warning('Dohvat stranice zaposlenika nije uspio: %s', tekst)
+        if generacija == self.generacija:
+            self.dohvat_u_tijeku = False
+            self.na_cekanju = []
+
+    def stranica_dohvacena(self, generacija, limit, zadnji_rb, redovi, gotovo):
+        if generacija != self.generacija:
+            return
+        self.dohvat_u_tijeku = False
+        self.sve_dohvaceno = limit < 0 or len(redovi) < limit
+        if not zadnji_rb:  # Prva stranica zamjenjuje sve retke
+            self.beginResetModel()
+            self.redovi = redovi
+            self.rbovi = [red[0] for red in redovi]
+            self.endResetModel()
+        elif redovi:
+            self.beginInsertRows(QModelIndex(), len(self.redovi), len(self.redovi) + len(redovi) - 1)
+            self.redovi.extend(redovi)
+            self.rbovi.extend(red[0] for red in redovi)
+            self.endInsertRows()
+        if gotovo is not None:
+            gotovo()
+        na_cekanju, self.na_cekanju = self.na_cekanju, []
+        for dohvat in na_cekanju:
+            dohvat()
+
+    def postavi_godinu(self, godina, min_redova=0, gotovo=None):
+        # Nakon osvjezavanja ucitava se barem onoliko redaka koliko ih je bilo ucitano prije
+        self.generacija += 1
+        self.godina = godina
+        self.dohvati(-1 if self.bez_stranica else max(min_redova, self.vidljivo_redova + self.predohvat), 0, gotovo)
+
+    def postavi_pretragu(self, tekst):
+        self.pretraga = tekst
+        self.postavi_godinu(self.godina)
+
+    def redak(self, rb):
+        row = bisect_left(self.rbovi, rb)
+        return row if row < len(self.rbovi) and self.rbovi[row] == rb else -1
+
+    def osvjezi_zaposlenike(self, rbovi):
+        if self.godina is None:
+            return
+        svi, rbovi = rbovi, sorted(rbovi)
+        if not self.sve_dohvaceno:  # Zaposlenike iza ucitanog raspona dohvatit ce sljedeca stranica
+            rbovi = rbovi[:bisect_right(rbovi, self.rbovi[-1] if self.rbovi else 0)]
+        if not rbovi:
+            return self.retci_osvjezeni.emit(svi)
+        if len(rbovi) > self.najvise_promjena:
+            return self.postavi_godinu(self.godina, min_redova=len(self.redovi),
+                                       gotovo=lambda: self.retci_osvjezeni.emit(svi))
+        generacija = self.generacija
+        radnik.posalji(podaci.retci_zaposlenika, self.godina, rbovi, self.pretraga,
+                       gotovo=lambda redovi: self.primijeni_promjene(generacija, rbovi, redovi, svi),
+                       greska=lambda tekst: log.warning('Osvjezavanje zaposlenika nije uspjelo: %s', tekst), tiho=True)
+
+    def primijeni_promjene(self, generacija, rbovi, redovi, svi):
+        # Postojeci redak se mijenja ili brise, a novi se umece samo unutar vec ucitanog raspona rb
+        # (iza njega ce ga dohvatiti sljedeca stranica). rbovi su poredani.
+        if generacija != self.generacija:
+            return
+        novi = {red[0]: red for red in redovi}
+        i = 0
+        while i < len(rbovi):
+            rb = rbovi[i]
+            row = bisect_left(self.rbovi, rb)
+            postoji = row < len(self.rbovi) and self.rbovi[row] == rb
+            if postoji and rb in novi:
+                self.redovi[row] = novi[rb]
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.zaglavlja) - 1))
+            elif postoji:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.redovi[row], self.rbovi[row]
+                self.endRemoveRows()
+            elif rb in novi and (row < len(self.rbovi) or self.sve_dohvaceno):
+                # Novi zaposlenici izmedu istih postojecih redaka umecu se odjednom
+                kraj = i + 1
+                while kraj < len(rbovi) and rbovi[kraj] in novi and (
+                        row == len(self.rbovi) or rbovi[kraj] < self.rbovi[row]):
+                    kraj += 1
+                self.beginInsertRows(QModelIndex(), row, row + kraj - i - 1)
+                self.redovi[row:row] = [novi[rb] for rb in rbovi[i:kraj]]
+                self.rbovi[row:row] = rbovi[i:kraj]
+                self.endInsertRows()
+                i = kraj
+                continue
+            i += 1
+        self.retci_osvjezeni.emit(svi)
 
 
 class CentralWidget(QWidget):
-    def __init__(self, parent=None):
+    # Bez spremne baze prozor se prikazuje prazan i ceka ucitaj_bazu, koja bazu priprema u radniku
+    def __init__(self, parent=None, baza_spremna=True):
         super(CentralWidget, self).__init__(parent)
         self.setWindowTitle('Godišnji odmor zaposlenika')
         self.resize(1200, 600)
 
         self.godina_odmora = self.trenutna_godina
+        self.odaberi_rb = None  # Novi zaposlenik koji se odabire kad se njegov redak osvjezi
 
         self.model = QueryModel()
-        self.set_model_data(init=True)
-        self.model.setHeaderData(0, Qt.Horizontal, 'Rb')
-        self.model.setHeaderData(1, Qt.Horizontal, 'Ime')
-        self.model.setHeaderData(2, Qt.Horizontal, 'Prezime')
-        self.model.setHeaderData(3, Qt.Horizontal, 'Ukupno dana')
-        self.model.setHeaderData(4, Qt.Horizontal, 'Iskorišteno')
 
         self.proxy = QSortFilterProxyModel()
         self.proxy.setSortLocaleAware(True)
         self.proxy.setSourceModel(self.model)
-        self.proxy.setFilterKeyColumn(-1)
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
 
         self.table = QTableView()
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.horizontalHeader().setSortIndicatorShown(True)  # Klik na zaglavlje sortira preko sortiraj
+        self.table.horizontalHeader().setSectionsClickable(True)
         self.table.verticalHeader().setFixedWidth(40)
         self.table.verticalHeader().setDefaultAlignment(Qt.AlignCenter)
         self.table.horizontalHeader().setHighlightSections(False)
@@ -58,6 +215,10 @@ class CentralWidget(QWidget):
         self.line_pretrazi.setFixedHeight(24)
         self.line_pretrazi.setPlaceholderText(' Ime ili prezime zaposlenika')
 
+        self.timer_pretrage = QTimer(self)  # Pretraga se pokrece tek kad se prestane tipkati
+        self.timer_pretrage.setSingleShot(True)
+        self.timer_pretrage.setInterval(250)
+
         self.spin_godina = QSpinBox()
         self.spin_godina.setMinimumWidth(100)
         self.spin_godina.setRange(2019, 2029)
@@ -73,7 +234,15 @@ class CentralWidget(QWidget):
         font = self.lbl_godina.font()
         font.setPointSize(15)
         self.lbl_godina.setFont(font)
+        self.lbl_ucitavanje = QLabel('Učitavanje baze...')
+        self.lbl_ucitavanje.hide()
+        self.kontrole = []  # Kontrole koje nisu dostupne dok se baza ucitava
+        self.pracenje = PracenjeBaze(parent=self)  # Promjene koje zapisu drugi klijenti iste baze
         self.setup_ui()
+        if baza_spremna:
+            self.prikazi_podatke()
+        else:
+            self.postavi_ucitavanje(True)
 
     def setup_ui(self):
         btn_unos = QPushButton('Novi unos')
@@ -94,6 +263,10 @@ class CentralWidget(QWidget):
         btn_izbrisi.setIconSize(QSize(18, 18))
         btn_izbrisi.setToolTip('Izbriši zaposlenika')
 
+        btn_uvoz = QPushButton('Uvoz')
+        btn_uvoz.setFixedHeight(30)
+        btn_uvoz.setToolTip('Uvoz zaposlenika iz CSV ili Excel datoteke')
+
         btn_pregled = QPushButton('Pregled')
         btn_pregled.setFixedHeight(30)
         btn_pregled.setIcon(QIcon(':icons/search.png'))
@@ -105,12 +278,14 @@ class CentralWidget(QWidget):
         hbox_btns.addWidget(btn_unos)
         hbox_btns.addWidget(btn_uredi)
         hbox_btns.addWidget(btn_izbrisi)
+        hbox_btns.addWidget(btn_uvoz)
         hbox_btns.addWidget(btn_pregled)
         hbox_btns.addStretch()
         hbox_btns.addWidget(self.lbl_godina)
 
         hbox_trazi = QHBoxLayout()
         hbox_trazi.addWidget(self.line_pretrazi)
+        hbox_trazi.addWidget(self.lbl_ucitavanje)
         hbox_trazi.addStretch()
         hbox_trazi.addWidget(self.btn_nova_god)
         hbox_trazi.addWidget(self.spin_godina)
@@ -129,14 +304,50 @@ class CentralWidget(QWidget):
         vlayout.addWidget(group_table)
         self.setLayout(vlayout)
 
-        self.line_pretrazi.textChanged.connect(self.proxy.setFilterRegExp)
+        self.line_pretrazi.textChanged.connect(lambda: self.timer_pretrage.start())
+        self.timer_pretrage.timeout.connect(lambda: self.model.postavi_pretragu(self.line_pretrazi.text()))
         self.spin_godina.valueChanged.connect(self.godina_changed)
         self.table.doubleClicked.connect(self.prikazi_godisnji)
+        self.table.horizontalHeader().sortIndicatorChanged.connect(self.sortiraj)
         btn_unos.clicked.connect(self.novi_zaposlenik)
         btn_uredi.clicked.connect(self.uredi_zaposlenika)
         btn_izbrisi.clicked.connect(self.izbrisi_korisnika)
-        btn_pregled.clicked.connect(DialogPregledZaPeriod.exec_dialog)
+        btn_uvoz.clicked.connect(self.uvezi_zaposlenike)
+        btn_pregled.clicked.connect(self.pregled_za_period)
         self.btn_nova_god.clicked.connect(self.otvori_godinu)
+        radnik.radnik().zauzet.connect(self.prikazi_zauzetost)
+        self.model.retci_osvjezeni.connect(self.retci_osvjezeni)
+        self.kontrole = [btn_unos, btn_uredi, btn_izbrisi, btn_uvoz, btn_pregled, self.line_pretrazi, self.spin_godina]
+
+    def ucitaj_bazu(self, gotovo=None):
+        # Stvaranje i migracija sheme izvrsavaju se u radniku, a prozor se za to vrijeme iscrtava.
+        # gotovo se poziva kad se ucita prva stranica pregleda.
+        radnik.posalji(database_create.pripremi_bazu, gotovo=lambda _: self.baza_ucitana(gotovo),
+                       greska=self.greska_baze)
+
+    def baza_ucitana(self, gotovo=None):
+        database_create.open_connection()  # Zadana veza GUI dretve (dijalozi), shema je vec pripremljena
+        self.prikazi_podatke(gotovo)
+        radnik.posalji(database_create.provjeri_plan_upita, tiho=True,  # Samo zapis u log, ne odgada pregled
+                       greska=lambda tekst: log.warning('Provjera planova upita nije uspjela: %s', tekst))
+
+    def greska_baze(self, tekst):
+        self.lbl_ucitavanje.setText('Baza nije dostupna')
+        QMessageBox.critical(self, 'Baza podataka', f'Baza se ne može otvoriti.\n\n{tekst}', QMessageBox.Ok)
+        raise Exception(tekst)
+
+    def prikazi_podatke(self, gotovo=None):
+        self.postavi_ucitavanje(False)
+        self.set_model_data(gotovo)
+        self.pracenje.pokreni()
+
+    def postavi_ucitavanje(self, ucitava):
+        # Tablicu nakon ucitavanja omogucuje postavi_otvorenu_godinu
+        for kontrola in self.kontrole:
+            kontrola.setEnabled(not ucitava)
+        if ucitava:
+            self.table.setEnabled(False)
+        self.lbl_ucitavanje.setVisible(ucitava)
 
     @property
     def trenutna_godina(self):
@@ -144,31 +355,59 @@ class CentralWidget(QWidget):
         return datum.year if datum.month > 6 else datum.year - 1
 
     def otvori_godinu(self):
+        # Otvaranje se prvo izvrsi kao proba, a korisnik potvrduje nakon sto vidi koliko ce se zapisa stvoriti
+        radnik.posalji(podaci.otvori_godinu, self.godina_odmora, True, True,
+                       gotovo=self.potvrdi_otvaranje, greska=self.greska_otvaranja)
+
+    def potvrdi_otvaranje(self, proba):
+        if not proba['redova']:
+            return QMessageBox.critical(None, 'Novi godišnji',
+                                        'Prethodna godina za unos godišnjeg odmora nije otvorena', QMessageBox.Ok)
         msg = QMessageBox(QMessageBox.Question, 'Novi godišnji',
-                          f'Jeste li sigurni da želite otvoriti {self.godina_odmora}. godinu za unos godišnjeg?',
+                          f'Jeste li sigurni da želite otvoriti {self.godina_odmora}. godinu za unos godišnjeg?\n\n'
+                          f'Broj zaposlenika: {proba["redova"]}\n'
+                          f'Neiskorišteni dani iz prethodne godine: {proba["preneseno"]}',
                           QMessageBox.Yes | QMessageBox.No)
         msg.button(QMessageBox.Yes).setText('Otvori')
         msg.button(QMessageBox.No).setText('Odustani')
+        msg.setCheckBox(QCheckBox('Prenesi neiskorištene dane'))
+        msg.checkBox().setChecked(True)
         if msg.exec_() == QMessageBox.Yes:
-            query = QSqlQuery(f"select rb from ukupno_dana where godina = {self.godina_odmora - 1} limit 1;")
-            if query.next() and query.record().value(0):  # Ako postoje zapisi u prethodnoj godini
-                query.exec_(f"insert into ukupno_dana select null, zaposlenik_rb, {self.godina_odmora}, br_dana "
-                            f"from ukupno_dana where godina = {self.godina_odmora - 1};")
-                self.set_model_data()
-            else:
-                QMessageBox.critical(None, 'Novi godišnji',
-                                     'Prethodna godina za unos godišnjeg odmora nije otvorena', QMessageBox.Ok)
-
-    def set_model_data(self, init=False):
-        self.model.setQuery(
-            f"""SELECT z.rb, z.ime, z.prezime, ud.br_dana, count(o.godina) as iskoristeno FROM zaposlenici z 
-            left join ukupno_dana ud on z.rb = ud.zaposlenik_rb and ud.godina = {self.godina_odmora}
-            left join odmor o on z.rb = o.zaposlenik_rb and o.godina = {self.godina_odmora} group by z.rb;""")
-        if not init:  # Nije inicijalno postavljanje
-            # novi_go=True. Nije otvorena godina, nijedan zaposlenik nema unesene dane godisnjeg
-            novi_go = len(set([self.model.data(self.model.index(row, 3)) for row in range(self.model.rowCount())])) == 1
-            self.table.setEnabled(False if novi_go else True)
-            self.btn_nova_god.setHidden(False if novi_go else True)
+            radnik.posalji(podaci.otvori_godinu, self.godina_odmora, msg.checkBox().isChecked(),
+                           gotovo=self.godina_otvorena, greska=self.greska_otvaranja)
+
+    @staticmethod
+    def greska_otvaranja(tekst):  # Transakcija je ponistena pa godina ostaje neotvorena
+        QMessageBox.critical(None, 'Novi godišnji', f'Godina nije otvorena.\n\n{tekst}', QMessageBox.Ok)
+
+    def godina_otvorena(self, rezultat):
+        log.info('Otvorena %s. godina: %s zaposlenika, preneseno %s dana, %.3f s', self.godina_odmora,
+                 rezultat['redova'], rezultat['preneseno'], rezultat['trajanje'])
+        self.set_model_data()
+
+    def resizeEvent(self, event):
+        super(CentralWidget, self).resizeEvent(event)
+        self.model.vidljivo_redova = self.table.viewport().height() // self.table.verticalHeader().defaultSectionSize()
+
+    def prikazi_zauzetost(self, zauzet):
+        if zauzet:
+            QApplication.setOverrideCursor(Qt.BusyCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+
+    def set_model_data(self, gotovo=None):
+        self.model.postavi_godinu(self.godina_odmora, min_redova=self.model.rowCount(), gotovo=gotovo)
+        radnik.posalji(podaci.godina_otvorena, self.godina_odmora, gotovo=self.postavi_otvorenu_godinu,
+                       greska=lambda tekst: log.warning('Provjera otvorene godine nije uspjela: %s', tekst))
+
+    def sortiraj(self, stupac, redoslijed):
+        # Retci se dohvacaju po stranicama redom rb, a sortirati se mogu tek kad su svi ucitani
+        self.model.dohvati_sve(lambda: self.proxy.sort(stupac, redoslijed))
+
+    def postavi_otvorenu_godinu(self, otvorena):
+        # Nije otvorena godina, nijedan zaposlenik nema unesene dane godisnjeg
+        self.table.setEnabled(otvorena)
+        self.btn_nova_god.setHidden(otvorena)
 
     def godina_changed(self, value):
         self.godina_odmora = value
@@ -176,49 +415,62 @@ class CentralWidget(QWidget):
         self.lbl_godina.setText(f'Godišnji odmor {self.godina_odmora}/{self.godina_odmora + 1} ')
 
     def prikazi_godisnji(self):
+        from odmor.dialogs import DialogPregledGodisnjeg
+
         zaposlenik = [inx.data() for inx in self.table.selectedIndexes()]
-        dialog = DialogPregledGodisnjeg(zaposlenik, self.godina_odmora)
-        iskoristeno = dialog.model.rowCount()
-        dialog.exec_()
-        if iskoristeno != dialog.model.rowCount():
-            self.set_model_data()
+        DialogPregledGodisnjeg(zaposlenik, self.godina_odmora).exec_()
+
+    @staticmethod
+    def pregled_za_period():
+        from odmor.dialogs import DialogPregledZaPeriod
+
+        DialogPregledZaPeriod.exec_dialog()
 
     def novi_zaposlenik(self):
+        from odmor.dialogs import DialogUnosZaposlenika
+
         dialog = DialogUnosZaposlenika()
         if dialog.exec_():
             ime, prez, br_dana, rb = dialog.get_input_data()
-            query = QSqlQuery()
-            if query.exec_("INSERT INTO zaposlenici (ime, prezime) VALUES ('{}', '{}')".format(ime, prez)):
-                last_id = query.lastInsertId()
-                query.exec_(f"select distinct godina from ukupno_dana where godina >= {self.trenutna_godina};")
-                while query.next():
-                    q = QSqlQuery("INSERT INTO ukupno_dana (zaposlenik_rb, godina, br_dana) VALUES ('{}', '{}', '{}')"
-                                  .format(last_id, query.value(0), br_dana))
-                row_count = self.model.rowCount()
-                self.set_model_data()
-                self.table.setFocus()
-                src_inx = self.proxy.mapFromSource(self.model.index(row_count, 0))
-                self.table.selectRow(src_inx.row())
-                self.table.setFocus()
+            radnik.posalji(podaci.novi_zaposlenik, ime, prez, br_dana, self.trenutna_godina,
+                           gotovo=self.zaposlenik_dodan, greska=self.greska_zapisa('Novi unos'))
+
+    def greska_zapisa(self, naslov):
+        # Neuspjeli zapis (npr. zakljucana baza na dijeljenom disku) se prijavljuje, a aplikacija nastavlja raditi
+        return lambda tekst: QMessageBox.critical(self, naslov, f'Promjena nije spremljena.\n\n{tekst}', QMessageBox.Ok)
+
+    def zaposlenik_dodan(self, rb):
+        self.odaberi_rb = rb
+
+    def retci_osvjezeni(self, rbovi):
+        # Zaposlenik iza ucitanih redaka nema redak dok se ne dohvati pomicanjem, pa se ne odabire. Stranice
+        # se ne ucitavaju samo zbog odabira.
+        if self.odaberi_rb in rbovi:
+            row = self.model.redak(self.odaberi_rb)
+            if row >= 0:
+                self.odaberi_redak(row)
+            self.odaberi_rb = None
+
+    def odaberi_redak(self, row):
+        self.table.selectRow(self.proxy.mapFromSource(self.model.index(row, 0)).row())
+        self.table.setFocus()
 
     def uredi_zaposlenika(self):
+        from odmor.dialogs import DialogUnosZaposlenika
+
         selected = self.table.selectedIndexes()
         if selected:
             dialog = DialogUnosZaposlenika()
             old_data = [inx.data() for inx in selected]
             dialog.set_zaposlenik_data(old_data)  # iskoristeni dani nisu potrebni
             if dialog.exec_():
-                query = QSqlQuery()
-                data = [*dialog.get_input_data()]
-                br_dana = data.pop(2)
-                if old_data[1:3] != data[:2]:  # Izmjenjeno je ime ili prezime
-                    query.exec_("UPDATE zaposlenici SET ime='{}', prezime='{}' WHERE rb={};".format(*data))
-                if old_data[3] != br_dana:  # Izmjenjeni broj dana godišnjeg
-                    query.exec_("UPDATE ukupno_dana SET br_dana={} WHERE zaposlenik_rb={} and godina={};"
-                                .format(br_dana, data[2], self.godina_odmora))
-                self.set_model_data()
-                self.table.selectRow(selected[0].row())
-                self.table.setFocus()
+                ime, prezime, br_dana, rb = dialog.get_input_data()
+                if old_data[1:3] == [ime, prezime]:  # Ime i prezime nisu izmjenjeni
+                    ime = prezime = None
+                if old_data[3] == br_dana:  # Broj dana godišnjeg nije izmjenjen
+                    br_dana = None
+                radnik.posalji(podaci.uredi_zaposlenika, rb, ime, prezime, br_dana, self.godina_odmora,
+                               greska=self.greska_zapisa('Uredi'))
 
     def izbrisi_korisnika(self):
         selected = self.table.selectedIndexes()
@@ -231,6 +483,18 @@ class CentralWidget(QWidget):
             odustani = msg.button(QMessageBox.No)
             odustani.setText('Odustani')
             if msg.exec_() == QMessageBox.Yes:
-                query = QSqlQuery()
-                if query.exec_("DELETE FROM zaposlenici WHERE rb={}".format(selected[0].data())):
-                    self.set_model_data()
+                radnik.posalji(podaci.izbrisi_zaposlenika, selected[0].data(), greska=self.greska_zapisa('Brisanje'))
+
+    def uvezi_zaposlenike(self):
+        from odmor import uvoz
+
+        fname = QFileDialog.getOpenFileName(self, 'Uvoz zaposlenika', os.path.expanduser('~/Desktop'),
+                                            uvoz.VRSTE_UVOZA)[0]
+        if fname:
+            radnik.posalji(uvoz.uvezi_datoteku, fname, self.trenutna_godina, gotovo=self.zaposlenici_uvezeni,
+                           greska=lambda tekst: QMessageBox.critical(self, 'Uvoz zaposlenika', tekst))
+
+    def zaposlenici_uvezeni(self, rezultat):
+        QMessageBox.information(self, 'Uvoz zaposlenika',
+                                f'Uvezeno zaposlenika: {rezultat["redova"]}\n'
+                                f'Trajanje: {rezultat["trajanje"]:.2f} s ({rezultat["redova_u_sekundi"]:.0f} redaka/s)')
@@ -0,0 +1,203 @@
+import time
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from odmor import promjene, upiti
+from odmor.jezgra.repozitoriji import STUPCI_STANJA, PregledZaPeriod, dani_za_unos, period_dana
+
+
+class PripremljeniUpiti:
+    # Pripremljene naredbe po vezi i tekstu naredbe. SQLite naredbu parsira i planira samo pri prvoj pripremi,
+    # a svako sljedece izvrsavanje samo veze nove vrijednosti. Svaku vezu koristi samo jedna dretva pa se i
+    # pogoci i promasaji broje po vezi.
+    def __init__(self):
+        self.upiti = {}  # naziv veze: {sql: QSqlQuery}
+        self.brojaci = {}  # naziv veze: [pogodaka, promasaja]
+
+    def upit(self, sql, dbase):
+        naziv = dbase.connectionName()
+        upiti_veze = self.upiti.setdefault(naziv, {})
+        brojaci = self.brojaci.setdefault(naziv, [0, 0])
+        query = upiti_veze.get(sql)
+        if query is not None:
+            brojaci[0] += 1
+            return query
+        brojaci[1] += 1
+        query = QSqlQuery(dbase)
+        if not query.prepare(sql):
+            raise Exception(query.lastError().text())
+        upiti_veze[sql] = query
+        return query
+
+    def zatvori(self, naziv_veze):
+        # Naredbe veze moraju se osloboditi prije zatvaranja veze
+        for query in self.upiti.pop(naziv_veze, {}).values():
+            query.finish()
+
+    def statistika(self):
+        return {'pogodaka': sum(brojaci[0] for brojaci in self.brojaci.values()),
+                'promasaja': sum(brojaci[1] for brojaci in self.brojaci.values()),
+                'naredbi': sum(map(len, self.upiti.values()))}
+
+
+pripremljeni = PripremljeniUpiti()
+
+
+def izvrsi(sql, dbase=None, **vrijednosti):
+    # Bez zadane veze upit se izvrsava preko zadane (default) veze GUI dretve. Vrijednosti se vezu na
+    # imenovane parametre (:naziv) pripremljene naredbe.
+    query = pripremljeni.upit(sql, dbase if dbase is not None else QSqlDatabase.database())
+    for naziv, vrijednost in vrijednosti.items():
+        query.bindValue(f':{naziv}', vrijednost)
+    if not query.exec_():
+        raise Exception(query.lastError().text())
+    return query
+
+
+def redovi(sql, dbase=None, **vrijednosti):
+    return redovi_upita(izvrsi(sql, dbase, **vrijednosti))
+
+
+def vrijednost(sql, dbase=None, **vrijednosti):
+    # Prva vrijednost prvog retka. Naredba se odmah zavrsava da ne drzi otvorenu transakciju citanja.
+    query = izvrsi(sql, dbase, **vrijednosti)
+    rezultat = query.value(0) if query.next() else None
+    query.finish()
+    return rezultat
+
+
+def statistika_upita():
+    return pripremljeni.statistika()
+
+
+def zatvori_upite(naziv_veze):
+    pripremljeni.zatvori(naziv_veze)
+
+
+def pregled_za_period(datum_od, datum_do, dbase=None):
+    pregled = PregledZaPeriod(datum_od, datum_do)
+    period = period_dana(datum_od, datum_do)
+    for dan, rbovi in redovi(upiti.PREGLED_ZA_PERIOD, dbase, **period):
+        pregled.dodaj_dan(dan, rbovi)
+    pregled.imena.update(redovi(upiti.ZAPOSLENICI_ZA_PERIOD, dbase, **period))
+    return pregled
+
+
+def stranica_zaposlenika(godina, zadnji_rb, limit, pretraga='', dbase=None):
+    uvjet, vrijednosti = upiti.uvjet_pretrage(pretraga)
+    return redovi(upiti.PREGLED_ZAPOSLENIKA.format(pretraga=uvjet), dbase, godina=godina, zadnji_rb=zadnji_rb,
+                  limit=limit, **vrijednosti)
+
+
+def retci_zaposlenika(godina, rbovi, pretraga='', dbase=None):
+    # Zaposlenik koji ne postoji ili ne odgovara pretrazi nema redak
+    uvjet, vrijednosti = upiti.uvjet_pretrage(pretraga)
+    retci = []
+    for parametri, vrijednosti_rbova in upiti.parametri_rbova(rbovi):
+        retci.extend(redovi(upiti.RETCI_ZAPOSLENIKA.format(rbovi=parametri, pretraga=uvjet), dbase, godina=godina,
+                            **vrijednosti_rbova, **vrijednosti))
+    return retci
+
+
+def redovi_upita(query):
+    broj_stupaca = query.record().count()
+    redovi = []
+    while query.next():
+        redovi.append(tuple(None if query.isNull(i) else query.value(i) for i in range(broj_stupaca)))
+    query.finish()
+    return redovi
+
+
+def godina_otvorena(godina, dbase=None):
+    return bool(vrijednost(upiti.GODINA_OTVORENA, dbase, godina=godina))
+
+
+def otvori_godinu(godina, prenesi=False, proba=False, dbase=None):
+    # Cijelo otvaranje je jedna transakcija. Proba izvrsava iste naredbe pa ih ponistava i samo vraca
+    # broj otvorenih zaposlenika, ukupno prenesene dane i trajanje. Nula zaposlenika znaci da prethodna
+    # godina nije otvorena.
+    dbase = dbase if dbase is not None else QSqlDatabase.database()
+    pocetak = time.perf_counter()
+    if not dbase.transaction():
+        raise Exception(dbase.lastError().text())
+    try:
+        redova = izvrsi(upiti.OTVORI_GODINU, dbase, godina=godina, prenesi=int(prenesi)).numRowsAffected()
+        preneseno = vrijednost(upiti.PRENESENO_U_GODINI, dbase, godina=godina)
+    except Exception:
+        dbase.rollback()
+        raise
+    if proba or not redova:
+        dbase.rollback()
+    elif not dbase.commit():
+        raise Exception(dbase.lastError().text())
+    return {'redova': redova, 'preneseno': preneseno, 'trajanje': time.perf_counter() - pocetak}
+
+
+def novi_zaposlenik(ime, prezime, br_dana, od_godine, dbase=None):
+    rb = izvrsi(upiti.NOVI_ZAPOSLENIK, dbase, ime=ime, prezime=prezime).lastInsertId()
+    izvrsi(upiti.NOVI_UKUPNO_DANA, dbase, rb=rb, br_dana=br_dana, od_godine=od_godine)
+    promjene.objavi([rb])
+    return rb
+
+
+def uredi_zaposlenika(rb, ime=None, prezime=None, br_dana=None, godina=None, dbase=None):
+    # Mijenjaju se samo zadani podaci, ime i prezime zajedno, a broj dana za zadanu godinu
+    if ime is not None:
+        izvrsi(upiti.UREDI_ZAPOSLENIKA, dbase, ime=ime, prezime=prezime, rb=rb)
+    if br_dana is not None:
+        izvrsi(upiti.UREDI_UKUPNO_DANA, dbase, br_dana=br_dana, rb=rb, godina=godina)
+    promjene.objavi([rb])
+
+
+def izbrisi_zaposlenika(rb, dbase=None):
+    izvrsi(upiti.IZBRISI_ZAPOSLENIKA, dbase, rb=rb)
+    promjene.objavi([rb])
+
+
+def promjene_od(verzija, data_version, dbase=None):
+    # PRAGMA data_version se mijenja samo kad bazu promijeni druga veza pa je provjera bez promjena jedan
+    # PRAGMA. Vraca novi data_version, zadnju verziju i rb zaposlenika promijenjenih nakon zadane verzije.
+    # Bez zadane verzije vraca se samo trenutna.
+    novi_data_version = vrijednost('PRAGMA data_version;', dbase)
+    if verzija is not None and novi_data_version == data_version:
+        return novi_data_version, verzija, []
+    if verzija is None:
+        return novi_data_version, vrijednost(upiti.ZADNJA_VERZIJA, dbase) or 0, []
+    rbovi = []
+    for rb, verzija_promjene in redovi(upiti.PROMJENE_OD_VERZIJE, dbase, verzija=verzija):
+        rbovi.append(rb)
+        verzija = max(verzija, verzija_promjene)
+    return novi_data_version, verzija, rbovi
+
+
+def stanje_godisnjeg(rb, godina, dbase=None):
+    # Ukupno, preneseno, iskoristeno i preostalo dana bez citanja pojedinih dana odmora.
+    # Zaposlenik bez otvorene godine nema nijedan dan.
+    stanje = redovi(upiti.STANJE_GODISNJEG, dbase, rb=rb, godina=godina)
+    if not stanje:
+        return dict.fromkeys(STUPCI_STANJA, 0)
+    return dict(zip(STUPCI_STANJA, stanje[0]))
+
+
+def unesi_odmor(rb, godina, datum_od, datum_do, dbase=None):
+    # Unosi sve radne dane perioda koji vec nisu uneseni, jednom batch naredbom u jednoj transakciji.
+    # Ako zaposleniku nije preostalo dovoljno dana nista se ne zapisuje.
+    dbase = dbase if dbase is not None else QSqlDatabase.database()
+    if not dbase.transaction():
+        raise Exception(dbase.lastError().text())
+    try:
+        uneseni = {red[0] for red in redovi(upiti.UNESENI_DANI, dbase, rb=rb, **period_dana(datum_od, datum_do))}
+        dani = dani_za_unos(datum_od, datum_do, uneseni, stanje_godisnjeg(rb, godina, dbase)['preostalo'])
+        if dani:
+            query = pripremljeni.upit(upiti.NOVI_ODMOR, dbase)
+            for stupac, vrijednosti in enumerate(([rb] * len(dani), dani, [godina] * len(dani))):
+                query.bindValue(stupac, vrijednosti)
+            if not query.execBatch():
+                raise Exception(query.lastError().text())
+    except Exception:
+        dbase.rollback()
+        raise
+    if not dbase.commit():
+        raise Exception(dbase.lastError().text())
+    promjene.objavi([rb] if dani else [])
+    return len(dani)
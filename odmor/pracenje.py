@@ -0,0 +1,45 @@
+import logging
+
+from PyQt5.QtCore import QObject, QTimer
+
+from odmor import podaci, promjene, radnik
+
+log = logging.getLogger(__name__)
+
+INTERVAL_PROVJERE = 2000  # ms izmedu provjera promjena koje su zapisali drugi klijenti iste baze
+
+
+class PracenjeBaze(QObject):
+    # Periodicno provjerava je li bazu promijenio drugi proces ili veza pa promijenjene zaposlenike
+    # objavljuje kao da su promijenjeni u ovom procesu
+    def __init__(self, interval=INTERVAL_PROVJERE, parent=None):
+        super(PracenjeBaze, self).__init__(parent)
+        self.verzija = None
+        self.data_version = None
+        self.u_tijeku = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.provjeri)
+
+    def pokreni(self):
+        self.provjeri()
+        self.timer.start()
+
+    def zaustavi(self):
+        self.timer.stop()
+
+    def provjeri(self):
+        if self.u_tijeku:  # Prethodna provjera jos ceka u redu radnika
+            return
+        self.u_tijeku = True
+        radnik.posalji(podaci.promjene_od, self.verzija, self.data_version, gotovo=self.provjereno,
+                       greska=self.greska, tiho=True)
+
+    def provjereno(self, rezultat):
+        self.u_tijeku = False
+        self.data_version, self.verzija, rbovi = rezultat
+        promjene.objavi(rbovi)
+
+    def greska(self, tekst):
+        self.u_tijeku = False
+        log.warning('Provjera promjena baze nije uspjela: %s', tekst)
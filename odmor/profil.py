@@ -0,0 +1,79 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+PRAG_MODULA = 0.001  # s, brzi moduli se ne ispisuju pojedinacno
+
+
+class ProfilPokretanja:
+    # Trajanje ucitavanja modula i koraka pokretanja aplikacije. Za svaki novi modul biljezi se ukupno
+    # trajanje i vlastito trajanje (bez modula koje on ucitava). Neaktivan profil nista ne mjeri.
+    def __init__(self, aktivan=True):
+        self.aktivan = aktivan
+        self.pocetak = time.perf_counter()
+        self.moduli = []  # (dubina, naziv, ukupno, vlastito)
+        self.koraci = []  # (naziv, trajanje)
+        self.djeca = [0.0]  # Trajanje ucitavanja unutar modula koji se trenutno ucitava
+        self.izvorni_import = None
+
+    def importiraj(self, naziv, globals=None, locals=None, fromlist=(), level=0):
+        broj_modula = len(sys.modules)
+        self.djeca.append(0.0)
+        pocetak = time.perf_counter()
+        try:
+            return self.izvorni_import(naziv, globals, locals, fromlist, level)
+        finally:
+            ukupno = time.perf_counter() - pocetak
+            djeca = self.djeca.pop()
+            self.djeca[-1] += ukupno
+            if len(sys.modules) > broj_modula:  # Ponovljeni import vec ucitanog modula se ne biljezi
+                if fromlist:
+                    naziv = f'{naziv} ({", ".join(fromlist)})'
+                self.moduli.append((len(self.djeca) - 1, naziv, ukupno, ukupno - djeca))
+
+    @contextmanager
+    def importi(self, naziv='importi'):
+        # Biljezi svaki modul ucitan unutar bloka. Mjeri se samo dretva koja ucitava, prije pokretanja drugih dretvi.
+        if not self.aktivan:
+            yield
+            return
+        self.izvorni_import = builtins.__import__
+        builtins.__import__ = self.importiraj
+        try:
+            with self.korak(naziv):
+                yield
+        finally:
+            builtins.__import__ = self.izvorni_import
+
+    @contextmanager
+    def korak(self, naziv):
+        if not self.aktivan:
+            yield
+            return
+        pocetak = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.koraci.append((naziv, time.perf_counter() - pocetak))
+
+    def mjerenje(self, naziv):
+        # Za korak koji zavrsava asinkrono, vraca funkciju koja se poziva na kraju koraka
+        pocetak = time.perf_counter()
+
+        def zavrsi(*args):
+            if self.aktivan:
+                self.koraci.append((naziv, time.perf_counter() - pocetak))
+
+        return zavrsi
+
+    def izvjestaj(self):
+        # Moduli su poredani redom zavrsetka ucitavanja, modul koji ucitava druge je ispod njih
+        retci = ['Ucitavanje modula (ms ukupno / vlastito):']
+        for dubina, naziv, ukupno, vlastito in self.moduli:
+            if ukupno >= PRAG_MODULA:
+                retci.append(f'{ukupno * 1000:9.1f} {vlastito * 1000:8.1f}  {"  " * dubina}{naziv}')
+        retci.append('Koraci pokretanja (ms):')
+        retci.extend(f'{trajanje * 1000:9.1f}  {naziv}' for naziv, trajanje in self.koraci)
+        retci.append(f'{(time.perf_counter() - self.pocetak) * 1000:9.1f}  ukupno od pokretanja profila')
+        return '\n'.join(retci)
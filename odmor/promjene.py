@@ -0,0 +1,27 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class Promjene(QObject):
+    # Svaki zapis u bazu objavljuje rb zaposlenika cije su se vrijednosti promijenile (dodani, izmijenjeni
+    # ili izbrisani). Zapisi se izvode u dretvi radnika, a primatelji u GUI dretvi dobivaju signal u redu.
+    zaposlenici = pyqtSignal(object)
+
+    def objavi(self, rbovi):
+        rbovi = set(rbovi)
+        if rbovi:
+            self.zaposlenici.emit(rbovi)
+
+
+_promjene = None
+
+
+def promjene():
+    # Objekt mora nastati u GUI dretvi, sto osigurava model pregleda koji se prvi spaja na signal
+    global _promjene
+    if _promjene is None:
+        _promjene = Promjene()
+    return _promjene
+
+
+def objavi(rbovi):
+    promjene().objavi(rbovi)
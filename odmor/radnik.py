@@ -0,0 +1,117 @@
+import logging
+from itertools import count
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtSql import QSqlDatabase
+
+import database_create
+from odmor import podaci
+
+log = logging.getLogger(__name__)
+
+
+class Izvrsitelj(QObject):
+    # Zivi u dretvi radnika i izvrsava poslove redom kojim su poslani, preko vlastite veze na bazu
+    gotovo = pyqtSignal(int, object)
+    greska = pyqtSignal(int, str)
+
+    def __init__(self, naziv_veze):
+        super(Izvrsitelj, self).__init__()
+        self.naziv_veze = naziv_veze
+        self.dbase = None
+
+    @pyqtSlot(int, object)
+    def izvrsi(self, rb, posao):
+        funkcija, args = posao
+        try:
+            if self.dbase is None:  # Veza se mora otvoriti u dretvi u kojoj se koristi
+                self.dbase = database_create.open_connection(self.naziv_veze)
+            self.gotovo.emit(rb, funkcija(*args, dbase=self.dbase))
+        except Exception as e:
+            self.greska.emit(rb, str(e))
+
+    @pyqtSlot()
+    def zatvori(self):
+        if self.dbase is not None:
+            podaci.zatvori_upite(self.naziv_veze)
+            self.dbase.close()
+            self.dbase = None
+            QSqlDatabase.removeDatabase(self.naziv_veze)
+
+
+class BazaRadnik(QObject):
+    # Posao je funkcija koja prima vezu kao argument dbase. Rezultat se vraca u GUI dretvu pozivom
+    # funkcije gotovo, a poruka greske pozivom funkcije greska (bez nje se greska samo zapisuje u log).
+    # Tihi poslovi (npr. periodicne provjere) ne ukljucuju oznaku zauzetosti.
+    zauzet = pyqtSignal(bool)
+    posao = pyqtSignal(int, object)
+    zatvori = pyqtSignal()
+
+    def __init__(self, naziv_veze=database_create.VEZA_PISANJE, parent=None):
+        super(BazaRadnik, self).__init__(parent)
+        self.brojac = count(1)
+        self.pozivi = {}  # rb posla: (gotovo, greska)
+        self.tihi = set()  # rb tihih poslova
+        self.thread = QThread()
+        self.izvrsitelj = Izvrsitelj(naziv_veze)
+        self.izvrsitelj.moveToThread(self.thread)
+        self.posao.connect(self.izvrsitelj.izvrsi)
+        self.zatvori.connect(self.izvrsitelj.zatvori)
+        self.izvrsitelj.gotovo.connect(self.posao_gotov)
+        self.izvrsitelj.greska.connect(self.posao_neuspio)
+        self.thread.start()
+
+    def posalji(self, funkcija, *args, gotovo=None, greska=None, tiho=False):
+        rb = next(self.brojac)
+        self.pozivi[rb] = (gotovo, greska)
+        if tiho:
+            self.tihi.add(rb)
+        elif len(self.pozivi) - len(self.tihi) == 1:
+            self.zauzet.emit(True)
+        self.posao.emit(rb, (funkcija, args))
+        return rb
+
+    def posao_gotov(self, rb, rezultat):
+        gotovo, _ = self.zavrsi(rb)
+        if gotovo is not None:
+            gotovo(rezultat)
+
+    def posao_neuspio(self, rb, tekst):
+        _, greska = self.zavrsi(rb)
+        if greska is not None:
+            greska(tekst)
+        else:  # Greska u slotu bi preko exception_hook zatvorila aplikaciju
+            log.warning('Posao u radniku nije uspio: %s', tekst)
+
+    def zavrsi(self, rb):
+        pozivi = self.pozivi.pop(rb)
+        if rb in self.tihi:
+            self.tihi.remove(rb)
+        elif len(self.pozivi) == len(self.tihi):
+            self.zauzet.emit(False)
+        return pozivi
+
+    def zaustavi(self):
+        self.zatvori.emit()
+        self.thread.quit()
+        self.thread.wait()
+
+
+_radnik = None
+
+
+def radnik():
+    # Jedan radnik za cijelu aplikaciju, pa se poslovi pisanja u bazu nikad ne preklapaju
+    global _radnik
+    if _radnik is None:
+        _radnik = BazaRadnik()
+    return _radnik
+
+
+def posalji(funkcija, *args, gotovo=None, greska=None, tiho=False):
+    return radnik().posalji(funkcija, *args, gotovo=gotovo, greska=greska, tiho=tiho)
+
+
+def zaustavi():
+    if _radnik is not None:
+        _radnik.zaustavi()
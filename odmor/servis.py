@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from urllib.parse import parse_qsl, urlsplit
+
+from odmor.jezgra import baza
+from odmor.jezgra.repozitoriji import STUPCI_PREGLEDA, Odmor, UkupnoDana, Zaposlenici
+from odmor.kalendar import iz_julijanskog_dana
+
+log = logging.getLogger(__name__)
+
+STATUSI = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+REDOVA_PO_DIJELU = 1000  # Redovi izvjestaja koji se citaju i salju odjednom
+
+
+class GreskaZahtjeva(Exception):
+    def __init__(self, status, tekst):
+        super(GreskaZahtjeva, self).__init__(tekst)
+        self.status = status
+
+
+class OdgovorPrekinut(Exception):
+    # Greska nakon sto je zaglavlje odgovora vec poslano, pa se odgovor samo prekida
+    pass
+
+
+class BazenVeza:
+    # Veze na bazu (sqlite3) za citanje se otvaraju po potrebi do zadanog broja i posuduju zahtjevima,
+    # a jedina veza za pisanje se koristi pod bravom. Upiti se izvode u dretvama da ne blokiraju petlju.
+    def __init__(self, putanja=None, velicina=4):
+        self.putanja = putanja
+        self.velicina = velicina
+        self.mjesta = asyncio.Semaphore(velicina)  # Najvise velicina veza za citanje u upotrebi
+        self.slobodne = []
+        self.veza_pisanje = None
+        self.brava_pisanja = asyncio.Lock()
+        self.izvrsitelj = ThreadPoolExecutor(max_workers=velicina + 1, thread_name_prefix='baza')
+
+    def otvori(self, samo_citanje):
+        return baza.otvori(self.putanja, samo_citanje, check_same_thread=False)
+
+    async def izvrsi(self, funkcija, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.izvrsitelj, funkcija, *args)
+
+    @asynccontextmanager
+    async def citanje(self):
+        # Mjesto se oslobada i kad se veza ne uspije otvoriti, pa sljedeci zahtjev pokusava ponovo
+        async with self.mjesta:
+            veza = self.slobodne.pop() if self.slobodne else await self.izvrsi(self.otvori, True)
+            try:
+                yield veza
+            finally:
+                self.slobodne.append(veza)
+
+    @asynccontextmanager
+    async def pisanje(self):
+        async with self.brava_pisanja:
+            if self.veza_pisanje is None:
+                self.veza_pisanje = await self.izvrsi(self.otvori, False)
+                log.info('Nacin dnevnika baze: %s', self.veza_pisanje.execute('PRAGMA journal_mode;').fetchone()[0])
+            yield self.veza_pisanje
+
+    def zatvori(self):
+        while self.slobodne:
+            self.slobodne.pop().close()
+        if self.veza_pisanje is not None:
+            self.veza_pisanje.close()
+        self.izvrsitelj.shutdown()
+
+
+def cijeli_broj(parametri, naziv, zadano=None):
+    try:
+        return int(parametri[naziv]) if naziv in parametri or zadano is None else zadano
+    except (KeyError, ValueError):
+        raise GreskaZahtjeva(400, f'Parametar {naziv} mora biti cijeli broj')
+
+
+def datum(parametri, naziv):
+    try:
+        return date.fromisoformat(parametri[naziv])
+    except (KeyError, ValueError):
+        raise GreskaZahtjeva(400, f'Parametar {naziv} mora biti datum (yyyy-mm-dd)')
+
+
+class OdmorServis:
+    # HTTP/JSON pristup podacima bez GUI-ja:
+    #   GET  /zaposlenici?godina=&zadnji_rb=&limit=&pretraga=  stranica pregleda zaposlenika
+    #   GET  /zaposlenici/<rb>/odmor?godina=                    stanje i dani godisnjeg zaposlenika
+    #   GET  /period?od=&do=                                    dani odmora u periodu, JSON se salje u dijelovima
+    #   POST /godine/<godina>/otvori?prenesi=&proba=             otvaranje godine
+    def __init__(self, bazen):
+        self.bazen = bazen
+        self.rute = (
+            ('GET', re.compile(r'/zaposlenici'), self.pregled_zaposlenika),
+            ('GET', re.compile(r'/zaposlenici/(\d+)/odmor'), self.odmor_zaposlenika),
+            ('GET', re.compile(r'/period'), self.period),
+            ('POST', re.compile(r'/godine/(\d+)/otvori'), self.otvori_godinu),
+        )
+
+    async def obradi(self, reader, writer):
+        pocetak = time.perf_counter()
+        status = 200
+        zahtjev = ''
+        try:
+            zahtjev = (await reader.readline()).decode('latin-1').strip()
+            metoda, putanja, _ = zahtjev.split(' ', 2)
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):  # Zaglavlja se ne koriste
+                pass
+            url = urlsplit(putanja)
+            parametri = dict(parse_qsl(url.query))
+            for ruta_metoda, uzorak, funkcija in self.rute:
+                pogodak = uzorak.fullmatch(url.path)
+                if pogodak:
+                    if ruta_metoda != metoda:
+                        raise GreskaZahtjeva(405, f'Dopustena metoda je {ruta_metoda}')
+                    rezultat = await funkcija(writer, parametri, *pogodak.groups())
+                    if rezultat is not None:
+                        self.posalji(writer, 200, rezultat)
+                    break
+            else:
+                raise GreskaZahtjeva(404, f'Nepoznata putanja {url.path}')
+        except OdgovorPrekinut:
+            status = 500
+            log.exception('Odgovor na zahtjev %s prekinut nakon poslanog zaglavlja', zahtjev)
+        except GreskaZahtjeva as e:
+            status = e.status
+            self.posalji(writer, status, {'greska': str(e)})
+        except ValueError:
+            status = 400
+            self.posalji(writer, status, {'greska': 'Neispravan zahtjev'})
+        except Exception as e:
+            status = 500
+            log.exception('Greska pri obradi zahtjeva %s', zahtjev)
+            self.posalji(writer, status, {'greska': str(e)})
+        finally:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+            log.info('%s %s %.1f ms', zahtjev, status, (time.perf_counter() - pocetak) * 1000)
+
+    @staticmethod
+    def zaglavlje(writer, status, dodatno):
+        writer.write(f'HTTP/1.1 {status} {STATUSI[status]}\r\nContent-Type: application/json; charset=utf-8\r\n'
+                     f'{dodatno}Connection: close\r\n\r\n'.encode('latin-1'))
+
+    def posalji(self, writer, status, podaci):
+        tijelo = json.dumps(podaci, ensure_ascii=False).encode('utf-8')
+        self.zaglavlje(writer, status, f'Content-Length: {len(tijelo)}\r\n')
+        writer.write(tijelo)
+
+    async def pregled_zaposlenika(self, writer, parametri):
+        stranica = (cijeli_broj(parametri, 'godina'), cijeli_broj(parametri, 'zadnji_rb', 0),
+                    min(cijeli_broj(parametri, 'limit', 100), 1000), parametri.get('pretraga', ''))
+        async with self.bazen.citanje() as veza:
+            redovi = await self.bazen.izvrsi(Zaposlenici(veza).stranica, *stranica)
+        return {'zaposlenici': [dict(zip(STUPCI_PREGLEDA, red)) for red in redovi]}
+
+    async def odmor_zaposlenika(self, writer, parametri, rb):
+        rb, godina = int(rb), cijeli_broj(parametri, 'godina')
+
+        def citaj(veza):
+            return dict(UkupnoDana(veza).stanje(rb, godina), dani=Odmor(veza).dani(rb, godina))
+
+        async with self.bazen.citanje() as veza:
+            return await self.bazen.izvrsi(citaj, veza)
+
+    async def period(self, writer, parametri):
+        # Odgovor se salje u dijelovima (chunked) kako se redovi citaju, bez cijelog izvjestaja u memoriji
+        period = datum(parametri, 'od'), datum(parametri, 'do')
+        async with self.bazen.citanje() as veza:
+            cursor = await self.bazen.izvrsi(Odmor(veza).po_danima, *period)
+            self.zaglavlje(writer, 200, 'Transfer-Encoding: chunked\r\n')
+            try:
+                dio, prvi = '[', True
+                while True:
+                    redovi = await self.bazen.izvrsi(cursor.fetchmany, REDOVA_PO_DIJELU)
+                    if not redovi:
+                        break
+                    for dan, zaposlenik in redovi:
+                        zapis = {'datum': str(iz_julijanskog_dana(dan)), 'zaposlenik': zaposlenik}
+                        dio += ('' if prvi else ',') + json.dumps(zapis, ensure_ascii=False)
+                        prvi = False
+                    self.posalji_dio(writer, dio)
+                    dio = ''
+                    await writer.drain()
+                self.posalji_dio(writer, dio + ']')
+                writer.write(b'0\r\n\r\n')
+            except Exception as e:  # Drugo zaglavlje bi zavrsilo u tijelu odgovora
+                raise OdgovorPrekinut(str(e)) from e
+
+    @staticmethod
+    def posalji_dio(writer, tekst):
+        dio = tekst.encode('utf-8')
+        writer.write(f'{len(dio):x}\r\n'.encode('latin-1') + dio + b'\r\n')
+
+    async def otvori_godinu(self, writer, parametri, godina):
+        otvaranje = (int(godina), bool(cijeli_broj(parametri, 'prenesi', 0)), bool(cijeli_broj(parametri, 'proba', 0)))
+        async with self.bazen.pisanje() as veza:
+            return await self.bazen.izvrsi(UkupnoDana(veza).otvori_godinu, *otvaranje)
+
+
+async def pokreni(adresa='127.0.0.1', port=8765, velicina_bazena=4, nacin_dnevnika=None, putanja=None):
+    log.info('Baza %s, zadani nacin dnevnika: %s', os.path.abspath(putanja or baza.dbase_name),
+             baza.postavi_nacin_dnevnika(nacin_dnevnika, putanja))
+    bazen = BazenVeza(putanja, velicina=velicina_bazena)
+    servis = OdmorServis(bazen)
+    server = await asyncio.start_server(servis.obradi, adresa, port)
+    log.info('Servis slusa na %s:%s', adresa, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        bazen.zatvori()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='HTTP/JSON servis godisnjeg odmora')
+    parser.add_argument('--adresa', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--veza', type=int, default=4, help='broj veza za citanje')
+    parser.add_argument('--baza', default=baza.dbase_name, help='putanja do baze')
+    parser.add_argument('--journal-mode', choices=baza.NACINI_DNEVNIKA,
+                        help='nacin dnevnika baze (zadano ODMOR_JOURNAL_MODE ili auto: WAL samo na lokalnom disku)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    try:
+        asyncio.run(pokreni(args.adresa, args.port, args.veza, args.journal_mode, args.baza))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,152 @@
+# SQL upiti koje koriste widgeti i provjera plana izvrsavanja pri pokretanju. Vrijednosti se vezu na imenovane
+# parametre (:naziv), a {} se popunjava samo dijelovima naredbe (uvjet pretrage, popis parametara).
+
+STUPCI_PREGLEDA = """
+    SELECT z.rb, z.ime, z.prezime, ud.br_dana, coalesce(ud.iskoristeno, 0) as iskoristeno, ud.preneseno,
+        ud.br_dana + ud.preneseno - ud.iskoristeno as preostalo
+    FROM zaposlenici z
+    left join ukupno_dana ud on z.rb = ud.zaposlenik_rb and ud.godina = :godina"""
+
+# Stranica pregleda zaposlenika, dohvaca se po rb (keyset) pocevsi iza zadnjeg ucitanog zaposlenika
+PREGLED_ZAPOSLENIKA = STUPCI_PREGLEDA + """
+    where z.rb > :zadnji_rb {pretraga} order by z.rb limit :limit;"""
+
+# Retci pregleda samo za promijenjene zaposlenike, {rbovi} je popis parametara (parametri_rbova)
+RETCI_ZAPOSLENIKA = STUPCI_PREGLEDA + """
+    where z.rb in ({rbovi}) {pretraga} order by z.rb;"""
+
+PRETRAGA_ZAPOSLENIKA = """
+    and z.rb in (select rowid from zaposlenici_pretraga where zaposlenici_pretraga match :izraz)"""
+
+GODINA_OTVORENA = "select exists(select 1 from ukupno_dana where godina = :godina);"
+
+# Otvaranje godine kopira broj dana iz prethodne godine. Neiskoristeni dani prethodne godine (ukupno i
+# preneseno umanjeno za brojac iskoristenih) prenose se ako je :prenesi razlicit od nule.
+OTVORI_GODINU = """
+    insert into ukupno_dana (zaposlenik_rb, godina, br_dana, preneseno)
+    select zaposlenik_rb, :godina, br_dana,
+        case when :prenesi then max(br_dana + preneseno - iskoristeno, 0) else 0 end
+    from ukupno_dana where godina = :godina - 1;"""
+
+PRENESENO_U_GODINI = "select coalesce(sum(preneseno), 0) from ukupno_dana where godina = :godina;"
+
+NOVI_ZAPOSLENIK = "INSERT INTO zaposlenici (ime, prezime) VALUES (:ime, :prezime);"
+
+# Novi zaposlenik dobiva broj dana godisnjeg u svim vec otvorenim godinama od zadane nadalje
+NOVI_UKUPNO_DANA = """
+    INSERT INTO ukupno_dana (zaposlenik_rb, godina, br_dana)
+    SELECT DISTINCT :rb, godina, :br_dana FROM ukupno_dana WHERE godina >= :od_godine;"""
+
+UREDI_ZAPOSLENIKA = "UPDATE zaposlenici SET ime = :ime, prezime = :prezime WHERE rb = :rb;"
+
+UREDI_UKUPNO_DANA = "UPDATE ukupno_dana SET br_dana = :br_dana WHERE zaposlenik_rb = :rb and godina = :godina;"
+
+IZBRISI_ZAPOSLENIKA = "DELETE FROM zaposlenici WHERE rb = :rb;"
+
+# Dani odmora su julijanski dani (kalendar.julijanski_dan), period se zadaje prvim i zadnjim danom
+
+# Rb zaposlenika na odmoru grupirani po danu, cita se samo indeks (dan, zaposlenik_rb)
+PREGLED_ZA_PERIOD = """
+    select o.dan, group_concat(o.zaposlenik_rb) as zaposlenici from dani_odmora o
+    where o.dan between :dan_od and :dan_do group by o.dan order by o.dan;"""
+
+# Imena se za pregled dohvacaju jednom po zaposleniku, a ne za svaki dan odmora
+ZAPOSLENICI_ZA_PERIOD = """
+    select z.rb, z.prezime || ' ' || z.ime from zaposlenici z
+    where z.rb in (select o.zaposlenik_rb from dani_odmora o where o.dan between :dan_od and :dan_do);"""
+
+# Stanje godisnjeg zaposlenika u godini iz brojaca iskoristenih dana, jedan redak po jedinstvenom indeksu
+STANJE_GODISNJEG = """
+    select br_dana, preneseno, iskoristeno, br_dana + preneseno - iskoristeno as preostalo from ukupno_dana
+    where zaposlenik_rb = :rb and godina = :godina;"""
+
+DANI_ODMORA_ZAPOSLENIKA = "select dan from dani_odmora where zaposlenik_rb = :rb and godina = :godina order by dan;"
+
+UNESENI_DANI = "select dan from dani_odmora where zaposlenik_rb = :rb and dan between :dan_od and :dan_do;"
+
+NOVI_ODMOR = "INSERT INTO dani_odmora (zaposlenik_rb, dan, godina) VALUES (?, ?, ?);"
+
+# Uvoz zaposlenika ide preko privremene tablice. Novi rb se dodjeljuje iza najveceg postojeceg.
+UVOZ_PRIVREMENA_TABLICA = """
+    CREATE TEMP TABLE IF NOT EXISTS uvoz (
+        rb INTEGER PRIMARY KEY, ime TEXT, prezime TEXT, br_dana INTEGER, zaposlenik_rb INTEGER);"""
+
+UVOZ_ZAPOSLENIKA = "INSERT INTO temp.uvoz (ime, prezime, br_dana) VALUES (?, ?, ?);"
+
+UVOZ_RB_ZAPOSLENIKA = "UPDATE temp.uvoz SET zaposlenik_rb = rb + (SELECT coalesce(max(rb), 0) FROM main.zaposlenici);"
+
+UVOZ_U_ZAPOSLENIKE = """
+    INSERT INTO zaposlenici (rb, ime, prezime) SELECT zaposlenik_rb, ime, prezime FROM temp.uvoz ORDER BY rb;"""
+
+UVOZ_RASPON_RB = "SELECT min(zaposlenik_rb), max(zaposlenik_rb) FROM temp.uvoz;"
+
+UVOZ_U_UKUPNO_DANA = """
+    INSERT INTO ukupno_dana (zaposlenik_rb, godina, br_dana)
+    SELECT u.zaposlenik_rb, g.godina, u.br_dana FROM temp.uvoz u
+    CROSS JOIN (SELECT DISTINCT godina FROM ukupno_dana WHERE godina >= :od_godine) g;"""
+
+# Izvoz cita retke poredane redom kojim se zapisuju, bez medurezultata u memoriji
+BROJ_DANA_ODMORA_ZA_PERIOD = "select count(*) from dani_odmora where dan between :dan_od and :dan_do;"
+
+IZVOZ_PO_DANIMA = """
+    select o.dan, z.prezime || ' ' || z.ime from dani_odmora o join zaposlenici z on z.rb = o.zaposlenik_rb
+    where o.dan between :dan_od and :dan_do order by o.dan;"""
+
+IZVOZ_PO_ZAPOSLENICIMA = """
+    select z.rb, z.prezime || ' ' || z.ime as zaposlenik, o.dan from dani_odmora o
+    join zaposlenici z on z.rb = o.zaposlenik_rb
+    where o.dan between :dan_od and :dan_do order by zaposlenik, z.rb, o.dan;"""
+
+# Okidaci nad zaposlenicima i ukupno_dana biljeze zadnju verziju promjene svakog zaposlenika
+ZADNJA_VERZIJA = "select coalesce(max(verzija), 0) from promjene;"
+
+PROMJENE_OD_VERZIJE = "select zaposlenik_rb, verzija from promjene where verzija > :verzija;"
+
+# Godisnji izvjestaj: stanje i dani odmora svakog zaposlenika s otvorenom godinom
+GODISNJI_IZVJESTAJ = """
+    select z.rb, z.prezime, z.ime, ud.br_dana, ud.preneseno, ud.iskoristeno,
+        ud.br_dana + ud.preneseno - ud.iskoristeno as preostalo,
+        (select group_concat(dan) from (
+            select o.dan from dani_odmora o where o.zaposlenik_rb = z.rb and o.godina = ud.godina
+            order by o.dan)) as dani
+    from ukupno_dana ud join zaposlenici z on z.rb = ud.zaposlenik_rb
+    where ud.godina = :godina order by z.prezime, z.ime, z.rb;"""
+
+# Brojac iskoristeno u ukupno_dana odrzavaju okidaci, ovi upiti ga usporeduju sa stvarnim stanjem
+NEISPRAVNI_BROJACI = """
+    select ud.rb, ud.zaposlenik_rb, ud.godina, ud.iskoristeno, count(o.rb) as stvarno from ukupno_dana ud
+    left join dani_odmora o on o.zaposlenik_rb = ud.zaposlenik_rb and o.godina = ud.godina
+    group by ud.rb having ud.iskoristeno != count(o.rb);"""
+
+POPRAVI_BROJACE = """
+    update ukupno_dana set iskoristeno = (
+        select count(*) from dani_odmora o
+        where o.zaposlenik_rb = ukupno_dana.zaposlenik_rb and o.godina = ukupno_dana.godina)
+    where iskoristeno != (
+        select count(*) from dani_odmora o
+        where o.zaposlenik_rb = ukupno_dana.zaposlenik_rb and o.godina = ukupno_dana.godina);"""
+
+
+RBOVA_PO_UPITU = 512  # Starije verzije SQLite-a dopustaju najvise 999 parametara u naredbi
+
+
+def uvjet_pretrage(tekst):
+    # Uvjet za {pretraga} i vrijednost njegovog parametra. Svaka rijec pretrage je prefiks imena ili prezimena.
+    # Dijakritici se uklanjaju u indeksu (tokenizer unicode61), osim slova đ koje tokenizer ne razlaze pa se
+    # zamjenjuje isto kao u okidacima indeksa.
+    rijeci = tekst.lower().replace('đ', 'd').replace('"', ' ').split()
+    if not rijeci:
+        return '', {}
+    return PRETRAGA_ZAPOSLENIKA, {'izraz': ' '.join(f'"{rijec}"*' for rijec in rijeci)}
+
+
+def parametri_rbova(rbovi):
+    # Za svaki dio od najvise RBOVA_PO_UPITU zaposlenika vraca popis parametara za {rbovi} i njihove vrijednosti.
+    # Broj parametara se zaokruzuje na potenciju broja 2 (ponavlja se zadnji rb) pa za bilo koji broj
+    # zaposlenika postoji samo nekoliko razlicitih naredbi.
+    rbovi = sorted(set(map(int, rbovi)))
+    for pocetak in range(0, len(rbovi), RBOVA_PO_UPITU):
+        dio = rbovi[pocetak:pocetak + RBOVA_PO_UPITU]
+        velicina = 1 << (len(dio) - 1).bit_length()
+        dio += dio[-1:] * (velicina - len(dio))
+        yield ', '.join(f':rb{i}' for i in range(velicina)), {f'rb{i}': rb for i, rb in enumerate(dio)}
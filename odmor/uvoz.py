@@ -0,0 +1,109 @@
+import csv
+import re
+import time
+import zipfile
+from xml.etree import ElementTree
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from odmor import promjene, upiti
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+VRSTE_UVOZA = 'Datoteke zaposlenika (*.csv *.xlsx);;CSV datoteka (*.csv);;Excel datoteka (*.xlsx)'
+
+
+def procitaj_csv(fpath):
+    with open(fpath, newline='', encoding='utf-8-sig') as f:
+        uzorak = f.read(4096)
+        f.seek(0)
+        delimiter = ';' if uzorak.count(';') >= uzorak.count(',') else ','
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def procitaj_xlsx(fpath):
+    # Cita vrijednosti prvog lista bez vanjskih biblioteka (pyexcelerate samo zapisuje xlsx)
+    with zipfile.ZipFile(fpath) as zf:
+        dijeljeni = []
+        if 'xl/sharedStrings.xml' in zf.namelist():
+            for si in ElementTree.parse(zf.open('xl/sharedStrings.xml')).getroot().iter(f'{XLSX_NS}si'):
+                dijeljeni.append(''.join(t.text or '' for t in si.iter(f'{XLSX_NS}t')))
+        listovi = sorted(n for n in zf.namelist() if re.fullmatch(r'xl/worksheets/sheet\d+\.xml', n))
+        if not listovi:
+            return
+        for row in ElementTree.parse(zf.open(listovi[0])).getroot().iter(f'{XLSX_NS}row'):
+            red = {}
+            for c in row.iter(f'{XLSX_NS}c'):
+                slova = re.match(r'[A-Z]+', c.get('r', 'A')).group()
+                stupac = sum((ord(s) - 64) * 26 ** i for i, s in enumerate(reversed(slova))) - 1
+                v = c.find(f'{XLSX_NS}v')
+                if c.get('t') == 's':
+                    red[stupac] = dijeljeni[int(v.text)]
+                elif c.get('t') == 'inlineStr':
+                    red[stupac] = ''.join(t.text or '' for t in c.iter(f'{XLSX_NS}t'))
+                elif v is not None:
+                    red[stupac] = v.text
+            yield [red.get(i) for i in range(max(red, default=-1) + 1)]
+
+
+def zaposlenici_iz_datoteke(fpath):
+    # Stupci su ime, prezime i broj dana godisnjeg. Prvi redak se preskace ako je zaglavlje.
+    redovi = procitaj_xlsx(fpath) if fpath.lower().endswith('.xlsx') else procitaj_csv(fpath)
+    zaposlenici = []
+    for broj, red in enumerate(redovi, start=1):
+        red = [str(v).strip() if v is not None else '' for v in red[:3]]
+        if not any(red):
+            continue
+        try:
+            ime, prezime, br_dana = red + [''] * (3 - len(red))
+            br_dana = int(float(br_dana.replace(',', '.')))
+        except ValueError:
+            if broj == 1:
+                continue
+            raise Exception(f'Neispravan broj dana u retku {broj}: {";".join(red)}')
+        if not ime or not prezime:
+            raise Exception(f'Nedostaje ime ili prezime u retku {broj}: {";".join(red)}')
+        zaposlenici.append((ime, prezime, br_dana))
+    return zaposlenici
+
+
+def uvezi_zaposlenike(zaposlenici, od_godine, dbase=None):
+    # Zaposlenici se batch naredbom upisuju u privremenu tablicu, a iz nje jednom naredbom u zaposlenike
+    # i jednom u ukupno_dana za sve otvorene godine od zadane nadalje. Sve je jedna transakcija.
+    dbase = dbase if dbase is not None else QSqlDatabase.database()
+    pocetak = time.perf_counter()
+    query = QSqlQuery(dbase)
+    if not query.exec_(upiti.UVOZ_PRIVREMENA_TABLICA) or not dbase.transaction():
+        raise Exception(dbase.lastError().text())
+    try:
+        izvrsi(query, 'DELETE FROM temp.uvoz;')
+        query.prepare(upiti.UVOZ_ZAPOSLENIKA)
+        for stupac in zip(*zaposlenici):
+            query.addBindValue(list(stupac))
+        if zaposlenici and not query.execBatch():
+            raise Exception(query.lastError().text())
+        izvrsi(query, upiti.UVOZ_RB_ZAPOSLENIKA)
+        izvrsi(query, upiti.UVOZ_U_ZAPOSLENIKE)
+        izvrsi(query, upiti.UVOZ_U_UKUPNO_DANA, od_godine=od_godine)
+        izvrsi(query, upiti.UVOZ_RASPON_RB)
+        prvi, zadnji = (query.value(0), query.value(1)) if query.next() and zaposlenici else (1, 0)
+        izvrsi(query, 'DELETE FROM temp.uvoz;')
+    except Exception:
+        dbase.rollback()
+        raise
+    if not dbase.commit():
+        raise Exception(dbase.lastError().text())
+    promjene.objavi(range(prvi, zadnji + 1))
+    trajanje = time.perf_counter() - pocetak
+    return {'redova': len(zaposlenici), 'trajanje': trajanje, 'redova_u_sekundi': len(zaposlenici) / trajanje}
+
+
+def uvezi_datoteku(fpath, od_godine, dbase=None):
+    return uvezi_zaposlenike(zaposlenici_iz_datoteke(fpath), od_godine, dbase)
+
+
+def izvrsi(query, sql, **vrijednosti):
+    query.prepare(sql)
+    for naziv, vrijednost in vrijednosti.items():
+        query.bindValue(f':{naziv}', vrijednost)
+    if not query.exec_():
+        raise Exception(query.lastError().text())